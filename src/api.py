@@ -12,6 +12,11 @@ import geopandas as gpd
 import pandas as pd
 from typing import Dict, Any, Optional
 
+try:
+    from src.utils import freshest_copy, load_buildings
+except ModuleNotFoundError:
+    from utils import freshest_copy, load_buildings
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for cross-origin requests
 
@@ -32,10 +37,12 @@ def load_buildings_data():
         DATA_PATH / "ranked_test_buildings.json"  # Fallback to test data
     ]
     
-    for data_file in data_files:
-        if data_file.exists():
+    for json_file in data_files:
+        # Prefer the GeoParquet copy, unless the JSON export is newer
+        data_file = freshest_copy(json_file)
+        if data_file is not None:
             try:
-                buildings_data = gpd.read_file(data_file)
+                buildings_data = load_buildings(data_file)
                 print(f"✓ Loaded {len(buildings_data)} buildings from {data_file}")
                 return True
             except Exception as e:
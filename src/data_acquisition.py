@@ -37,7 +37,7 @@ def fetch_pdok_buildings(
     if isinstance(area, tuple):
         area_gdf = gpd.GeoDataFrame(geometry=[box(*area)], crs="EPSG:4326")
     elif isinstance(area, (str, Path)):
-        area_gdf = gpd.read_file(area)
+        area_gdf = gpd.read_file(area, engine='pyogrio')
     elif isinstance(area, (gpd.GeoDataFrame, gpd.GeoSeries)):
         area_gdf = gpd.GeoDataFrame(geometry=area.geometry)
     else:
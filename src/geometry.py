@@ -6,6 +6,7 @@ Interpolates solar values for buildings from point data.
 
 import numpy as np
 import geopandas as gpd
+import shapely
 from shapely.geometry import Polygon, Point
 from typing import Tuple, Optional, Dict
 import json
@@ -82,6 +83,61 @@ def calculate_roof_orientation(geometry: Polygon) -> float:
     return azimuth
 
 
+def _first_per_group(groups: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Positions of the first largest value within each group (stable on ties)."""
+    order = np.lexsort((-values, groups))
+    sorted_groups = groups[order]
+    is_first = np.r_[True, sorted_groups[1:] != sorted_groups[:-1]]
+    return order[is_first]
+
+
+def calculate_roof_orientation_batch(geometries) -> np.ndarray:
+    """
+    Calculate roof orientation for many building footprints at once.
+    
+    Vectorized version of `calculate_roof_orientation`: the longest exterior
+    edge of every footprint (largest part for MultiPolygons) is found with
+    NumPy over the flattened ring coordinates instead of a Python loop per
+    building.
+    
+    Parameters
+    ----------
+    geometries : array-like of Polygon or MultiPolygon
+        Building footprint geometries (e.g. a GeoSeries)
+    
+    Returns
+    -------
+    np.ndarray
+        Orientation in degrees (0-360) for each geometry, 0.0 if it has no edges
+    """
+    geoms = np.asarray(geometries, dtype=object)
+    orientations = np.zeros(len(geoms), dtype=float)
+    if len(geoms) == 0:
+        return orientations
+    
+    # Keep the largest polygon of each (Multi)Polygon
+    parts, part_owner = shapely.get_parts(geoms, return_index=True)
+    largest = _first_per_group(part_owner, shapely.area(parts))
+    polygons, polygon_owner = parts[largest], part_owner[largest]
+    
+    # Edges between consecutive vertices of each closed exterior ring
+    rings = shapely.get_exterior_ring(polygons)
+    coords, ring_idx = shapely.get_coordinates(rings, return_index=True)
+    same_ring = ring_idx[1:] == ring_idx[:-1]
+    deltas = (coords[1:] - coords[:-1])[same_ring]
+    edge_ring = ring_idx[:-1][same_ring]
+    if len(edge_ring) == 0:
+        return orientations
+    
+    # Longest edge per ring -> azimuth (0=North, clockwise)
+    longest = _first_per_group(edge_ring, np.hypot(deltas[:, 0], deltas[:, 1]))
+    dx, dy = deltas[longest, 0], deltas[longest, 1]
+    azimuth = (np.degrees(np.arctan2(dx, dy)) + 360) % 360
+    
+    orientations[polygon_owner[edge_ring[longest]]] = azimuth
+    return orientations
+
+
 def calculate_roof_slope(building_height: float, roof_type: str = "flat") -> float:
     """
     Calculate roof slope angle.
@@ -307,7 +363,7 @@ class BuildingGeometryProcessor:
         """Load building and solar data from files."""
         # Load buildings
         if Path(self.buildings_path).exists():
-            self.buildings_gdf = gpd.read_file(self.buildings_path)
+            self.buildings_gdf = gpd.read_file(self.buildings_path, engine='pyogrio')
             print(f"Loaded {len(self.buildings_gdf)} buildings from {self.buildings_path}")
         else:
             print(f"Warning: {self.buildings_path} not found")
@@ -342,9 +398,9 @@ class BuildingGeometryProcessor:
             calculate_roof_area
         )
         
-        # Calculate roof orientation
-        self.buildings_gdf['roof_orientation_deg'] = self.buildings_gdf.geometry.apply(
-            calculate_roof_orientation
+        # Calculate roof orientation (vectorized over all footprints)
+        self.buildings_gdf['roof_orientation_deg'] = calculate_roof_orientation_batch(
+            self.buildings_gdf.geometry
         )
         
         # Get number of vertices
@@ -7,36 +7,41 @@ Calculates suitability scores and ranks buildings for solar panel installation.
 import numpy as np
 import pandas as pd
 import geopandas as gpd
-from typing import Dict, List
+from typing import Dict, List, Union
+from numpy.typing import ArrayLike
 
 
 def calculate_suitability_score(
-    roof_area: float,
-    energy_potential: float,
-    shading_factor: float,
-    orientation: float,
+    roof_area: ArrayLike,
+    energy_potential: ArrayLike,
+    shading_factor: ArrayLike,
+    orientation: ArrayLike,
     weights: Dict[str, float] = None
-) -> float:
+) -> Union[float, np.ndarray]:
     """
     Calculate overall suitability score using weighted combination.
     
+    Accepts scalars or 1-D arrays (one value per building). Array inputs are
+    scored in a single vectorized pass: the normalized factors form an (n, 4)
+    matrix that is multiplied by the weights vector.
+    
     Parameters
     ----------
-    roof_area : float
+    roof_area : float or array-like
         Roof area in m²
-    energy_potential : float
+    energy_potential : float or array-like
         Annual energy potential in kWh
-    shading_factor : float
+    shading_factor : float or array-like
         Shading factor (0-1, lower is better)
-    orientation : float
+    orientation : float or array-like
         Roof orientation in degrees (0-360)
     weights : dict, optional
         Weights for each factor
     
     Returns
     -------
-    float
-        Suitability score (0-100)
+    float or np.ndarray
+        Suitability score (0-100); an array if any input is an array
     """
     if weights is None:
         weights = {
@@ -46,56 +51,106 @@ def calculate_suitability_score(
             'orientation': 0.2
         }
     
+    inputs = (roof_area, energy_potential, shading_factor, orientation)
+    scalar_input = all(np.ndim(value) == 0 for value in inputs)
+    area, energy, shading, orient = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(value, dtype=float)) for value in inputs)
+    )
+    
     # Normalize factors to 0-1 scale
-    area_score = min(roof_area / 500, 1.0)  # Assume 500m² is ideal
-    energy_score = min(energy_potential / 50000, 1.0)  # Normalize energy
-    shading_score = 1 - shading_factor  # Lower shading is better
+    area_score = np.minimum(area / 500, 1.0)  # Assume 500m² is ideal
+    energy_score = np.minimum(energy / 50000, 1.0)  # Normalize energy
+    shading_score = 1 - shading  # Lower shading is better
     
     # Orientation score: South-facing (180°) is optimal
-    orientation_diff = abs(orientation - 180)
-    orientation_score = 1 - (orientation_diff / 180)
-    
-    # Weighted combination
-    total_score = (
-        area_score * weights['area'] +
-        energy_score * weights['energy'] +
-        shading_score * weights['shading'] +
-        orientation_score * weights['orientation']
-    )
+    orientation_score = 1 - (np.abs(orient - 180) / 180)
+    
+    # Weighted combination: (n, 4) factors @ (4,) weights
+    factors = np.column_stack([area_score, energy_score, shading_score, orientation_score])
+    weights_vec = np.array([
+        weights['area'],
+        weights['energy'],
+        weights['shading'],
+        weights['orientation']
+    ])
+    total_score = factors @ weights_vec
     
-    return total_score * 100  # Convert to 0-100 scale
+    scores = total_score * 100  # Convert to 0-100 scale
+    return float(scores[0]) if scalar_input else scores
 
 
-def classify_building_suitability(score: float) -> str:
+# Storage dtype for persisted suitability scores: scores live in [0, 100], so
+# float32 keeps ~1e-5 resolution at half the size of float64
+SCORE_DTYPE = np.float32
+
+
+def _score_array(buildings_gdf: gpd.GeoDataFrame) -> np.ndarray:
+    """
+    Suitability scores as float64, with missing scores as -inf (ranked last).
+    
+    float64 holds float32 and float64 columns exactly, so the ranking always
+    follows the scores as stored in the frame.
+    """
+    scores = buildings_gdf['suitability_score'].to_numpy(dtype=np.float64)
+    return np.where(np.isnan(scores), -np.inf, scores)
+
+
+# Lower bounds of the Poor, Moderate, Good and Excellent categories
+_CATEGORY_THRESHOLDS = np.array([20.0, 40.0, 60.0, 80.0])
+_CATEGORY_LABELS = np.array(["Unsuitable", "Poor", "Moderate", "Good", "Excellent"])
+
+
+def classify_building_suitability(score: ArrayLike) -> Union[str, np.ndarray]:
     """
     Classify building into suitability categories.
     
+    Categories are looked up with a binary search over the category
+    thresholds, so a whole array of scores is classified in one call.
+    
     Parameters
     ----------
-    score : float
-        Suitability score (0-100)
+    score : float or array-like
+        Suitability score (0-100), or one score per building
     
     Returns
     -------
-    str
-        Suitability category
+    str or np.ndarray
+        Suitability category (an array of categories for array input)
     """
-    if score >= 80:
-        return "Excellent"
-    elif score >= 60:
-        return "Good"
-    elif score >= 40:
-        return "Moderate"
-    elif score >= 20:
-        return "Poor"
-    else:
-        return "Unsuitable"
+    scores = np.asarray(score, dtype=float)
+    
+    # side='right' puts a score equal to a threshold in the upper category
+    category_idx = np.searchsorted(_CATEGORY_THRESHOLDS, scores, side='right')
+    category_idx = np.where(np.isnan(scores), 0, category_idx)  # NaN -> Unsuitable
+    categories = _CATEGORY_LABELS[category_idx]
+    
+    if np.ndim(score) == 0:
+        return str(categories)
+    return categories
+
+
+def _take_ranked(buildings_gdf: gpd.GeoDataFrame, order: np.ndarray) -> gpd.GeoDataFrame:
+    """
+    Take the rows at positions `order` and number them 1..len(order).
+    
+    The positional take is the only copy made: the rank column is inserted
+    into the taken frame in place instead of through `assign`, which would
+    copy every column (geometry included) a second time.
+    """
+    ranked = buildings_gdf.iloc[order]
+    if 'rank' in ranked.columns:
+        del ranked['rank']
+    ranked.insert(len(ranked.columns), 'rank', np.arange(1, len(order) + 1))
+    
+    return ranked
 
 
 def rank_buildings(buildings_gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     """
     Rank buildings by suitability score.
     
+    Buildings with equal scores keep their input order (stable sort).
+    
     Parameters
     ----------
     buildings_gdf : gpd.GeoDataFrame
@@ -106,11 +161,12 @@ def rank_buildings(buildings_gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     gpd.GeoDataFrame
         Ranked buildings with priority order
     """
-    # Sort by suitability score (descending)
-    ranked = buildings_gdf.sort_values('suitability_score', ascending=False)
-    ranked['rank'] = range(1, len(ranked) + 1)
+    # Sort by suitability score (descending) with one stable argsort on the
+    # score array; ties keep their input order and missing scores rank last
+    scores = _score_array(buildings_gdf)
+    order = np.argsort(-scores, kind='stable')
     
-    return ranked
+    return _take_ranked(buildings_gdf, order)
 
 
 def get_priority_list(
@@ -132,8 +188,25 @@ def get_priority_list(
     gpd.GeoDataFrame
         Top priority buildings
     """
-    ranked = rank_buildings(buildings_gdf)
-    return ranked.head(top_n)
+    n = len(buildings_gdf)
+    if top_n >= n:
+        return rank_buildings(buildings_gdf)
+    if top_n <= 0:
+        return rank_buildings(buildings_gdf).head(top_n)
+    
+    # Partial selection: O(n) partition + O(k log k) sort of the winners only,
+    # instead of sorting all n buildings. Missing scores rank last.
+    scores = _score_array(buildings_gdf)
+    kth_score = np.partition(scores, n - top_n)[n - top_n]
+    
+    # Everything above the k-th score, plus the earliest rows tied with it
+    above = np.flatnonzero(scores > kth_score)
+    tied = np.flatnonzero(scores == kth_score)[:top_n - len(above)]
+    top_idx = np.sort(np.concatenate([above, tied]))
+    top_idx = top_idx[np.argsort(-scores[top_idx], kind='stable')]
+    
+    # Only the top_n selected rows are materialized
+    return _take_ranked(buildings_gdf, top_idx)
 
 
 # ============================================================================
@@ -151,18 +224,17 @@ if __name__ == "__main__":
     print("=" * 70)
     
     # Load processed buildings
-    buildings_gdf = gpd.read_file("data/processed_buildings.json")
+    buildings_gdf = gpd.read_file("data/processed_buildings.json", engine="pyogrio")
     
     # Calculate suitability scores
     print("Calculating suitability scores...")
-    buildings_gdf['suitability_score'] = buildings_gdf.apply(
-        lambda row: calculate_suitability_score(
-            roof_area=row.get('roof_area_m2', 0),
-            energy_potential=row.get('solar_energy_kwh', 0),
-            shading_factor=row.get('shading_factor', 0),
-            orientation=row.get('roof_orientation_deg', 0)
-        ), axis=1
-    )
+    buildings_gdf['suitability_score'] = calculate_suitability_score(
+        roof_area=buildings_gdf.get('roof_area_m2', 0),
+        energy_potential=buildings_gdf.get('solar_energy_kwh', 0),
+        shading_factor=buildings_gdf.get('shading_factor', 0),
+        orientation=buildings_gdf.get('roof_orientation_deg', 0)
+    ).astype(SCORE_DTYPE)
+    buildings_gdf['category'] = classify_building_suitability(buildings_gdf['suitability_score'])
     
     # Rank buildings
     print("Ranking buildings...")
@@ -172,6 +244,10 @@ if __name__ == "__main__":
     ranked_buildings.to_file("data/ranked_buildings.json", driver="GeoJSON")
     print(f"✓ Ranked {len(ranked_buildings)} buildings saved to data/ranked_buildings.json")
     
+    # GeoParquet copy for fast columnar reads (used by visualization.py)
+    ranked_buildings.to_parquet("data/ranked_buildings.parquet", compression="zstd")
+    print("✓ GeoParquet copy saved to data/ranked_buildings.parquet")
+    
     # Get top priority buildings
     top_buildings = get_priority_list(ranked_buildings, top_n=100)
     top_buildings.to_file("data/top_100_buildings.json", driver="GeoJSON")
@@ -191,18 +267,17 @@ if __name__ == "__main__":
     print("=" * 70)
     
     # Load processed test buildings
-    buildings_gdf = gpd.read_file("data/processed_test_buildings.json")
+    buildings_gdf = gpd.read_file("data/processed_test_buildings.json", engine="pyogrio")
     
     # Calculate suitability scores
     print("Calculating suitability scores...")
-    buildings_gdf['suitability_score'] = buildings_gdf.apply(
-        lambda row: calculate_suitability_score(
-            roof_area=row.get('roof_area_m2', 0),
-            energy_potential=row.get('solar_energy_kwh', 0),
-            shading_factor=row.get('shading_factor', 0),
-            orientation=row.get('roof_orientation_deg', 0)
-        ), axis=1
-    )
+    buildings_gdf['suitability_score'] = calculate_suitability_score(
+        roof_area=buildings_gdf.get('roof_area_m2', 0),
+        energy_potential=buildings_gdf.get('solar_energy_kwh', 0),
+        shading_factor=buildings_gdf.get('shading_factor', 0),
+        orientation=buildings_gdf.get('roof_orientation_deg', 0)
+    ).astype(SCORE_DTYPE)
+    buildings_gdf['category'] = classify_building_suitability(buildings_gdf['suitability_score'])
     
     # Rank buildings
     print("Ranking buildings...")
@@ -212,6 +287,10 @@ if __name__ == "__main__":
     ranked_buildings.to_file("data/ranked_test_buildings.json", driver="GeoJSON")
     print(f"✓ Ranked {len(ranked_buildings)} buildings saved to data/ranked_test_buildings.json")
     
+    # GeoParquet copy for fast columnar reads (used by visualization.py)
+    ranked_buildings.to_parquet("data/ranked_test_buildings.parquet", compression="zstd")
+    print("✓ GeoParquet copy saved to data/ranked_test_buildings.parquet")
+    
     # Get top priority buildings
     top_buildings = get_priority_list(ranked_buildings, top_n=20)
     top_buildings.to_file("data/top_20_test_buildings.json", driver="GeoJSON")
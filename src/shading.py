@@ -4,22 +4,60 @@ Calculates shading effects from nearby buildings.
 """
 
 
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
 import numpy as np
 import geopandas as gpd
-from shapely.geometry import Point, Polygon
-from typing import List, Tuple
+import shapely
+from shapely.geometry import Point, Polygon, box
+from typing import List, Optional, Tuple
 
 try:
-    from src.spatial_search import SpatialIndex
+    from src.solar import load_kernels
 except ModuleNotFoundError:
-    from spatial_search import SpatialIndex
+    from solar import load_kernels
+
+
+def sun_tangent(sun_elevation: float) -> float:
+    """
+    Calculate tan(sun elevation) for reuse across a batch of buildings.
+    
+    Parameters
+    ----------
+    sun_elevation : float
+        Sun elevation angle in degrees
+    
+    Returns
+    -------
+    float
+        Tangent of the elevation, or 0.0 when the sun is at or below the
+        horizon or directly overhead (no shadow is cast)
+    """
+    sun_elevation = float(sun_elevation)
+    if sun_elevation <= 0 or sun_elevation >= 90:
+        return 0.0
+    
+    return _tan_sun(sun_elevation)
+
+
+def _building_heights(buildings: gpd.GeoDataFrame) -> np.ndarray:
+    """Building heights as floats: building_height, else height, else 10 m."""
+    if 'building_height' in buildings.columns:
+        return buildings['building_height'].to_numpy(dtype=float)
+    if 'height' in buildings.columns:
+        return buildings['height'].to_numpy(dtype=float)
+    return np.full(len(buildings), 10.0)
 
 
 def calculate_shading_factor(
     building_geometry: Polygon,
     building_height: float,
     nearby_buildings: gpd.GeoDataFrame,
-    sun_elevation: float = 45.0
+    sun_elevation: float = 45.0,
+    tan_sun: Optional[float] = None
 ) -> float:
     """
     Calculate shading factor for a building based on nearby obstructions.
@@ -34,6 +72,10 @@ def calculate_shading_factor(
         GeoDataFrame of nearby buildings with heights
     sun_elevation : float
         Average sun elevation angle in degrees (default 45°)
+    tan_sun : float, optional
+        Precomputed `sun_tangent(sun_elevation)`. Pass it when shading many
+        buildings under the same sun so the tangent is evaluated once per
+        batch; when given, `sun_elevation` is ignored.
     
     Returns
     -------
@@ -43,64 +85,191 @@ def calculate_shading_factor(
     if len(nearby_buildings) == 0:
         return 0.0  # No nearby buildings, no shading
     
-    # Get target building centroid
+    if tan_sun is None:
+        tan_sun = sun_tangent(sun_elevation)
+    if tan_sun <= 0:
+        return 0.0  # Sun outside (0°, 90°), no shadows cast
+    
+    # Nearby building properties as arrays (shapely 2 vectorized operations)
+    nearby_geoms = np.asarray(nearby_buildings.geometry.values)
+    nearby_heights = _building_heights(nearby_buildings)
+    
+    # Distances between target centroid and nearby centroids
     target_centroid = building_geometry.centroid
+    distances = shapely.distance(target_centroid, shapely.centroid(nearby_geoms))
+    
+    # Height difference and shadow length cast by each nearby building
+    height_diff = nearby_heights - building_height
+    shadow_lengths = nearby_heights / tan_sun
     
-    shading_scores = []
-    
-    for idx, nearby in nearby_buildings.iterrows():
-        # Get nearby building properties
-        nearby_geom = nearby.geometry
-        nearby_height = nearby.get('building_height', nearby.get('height', 10.0))
-        
-        # Calculate distance between centroids
-        distance = target_centroid.distance(nearby_geom.centroid)
-        
-        if distance < 1:  # Skip if same building (distance ~0)
-            continue
-        
-        # Calculate height difference
-        height_diff = nearby_height - building_height
-        
-        # Only consider taller buildings that can cast shadows
-        if height_diff > 0:
-            # Calculate shadow length from nearby building
-            shadow_length = calculate_shadow_length(nearby_height, sun_elevation)
-            
-            # If target building is within shadow range
-            if distance <= shadow_length:
-                # Shading intensity decreases with distance
-                # Formula: intensity = height_diff * (1 - distance/shadow_length)
-                intensity = (height_diff / 50.0) * (1 - distance / shadow_length)
-                intensity = min(intensity, 1.0)  # Cap at 1.0
-                
-                # Consider building size (larger buildings cast more shadow)
-                size_factor = min(nearby_geom.area / building_geometry.area, 2.0)
-                intensity *= (0.5 + 0.5 * min(size_factor, 1.0))
-                
-                shading_scores.append(intensity)
-    
-    if not shading_scores:
+    # Only taller buildings (not the target itself, distance ~0) whose
+    # shadow reaches the target contribute
+    casts_shadow = (distances >= 1) & (height_diff > 0) & (distances <= shadow_lengths)
+    if not casts_shadow.any():
         return 0.0
     
+    distances = distances[casts_shadow]
+    shadow_lengths = shadow_lengths[casts_shadow]
+    
+    # Shading intensity decreases with distance
+    # Formula: intensity = height_diff * (1 - distance/shadow_length)
+    intensity = (height_diff[casts_shadow] / 50.0) * (1 - distances / shadow_lengths)
+    intensity = np.minimum(intensity, 1.0)  # Cap at 1.0
+    
+    # Consider building size (larger buildings cast more shadow)
+    size_factor = np.minimum(shapely.area(nearby_geoms[casts_shadow]) / building_geometry.area, 2.0)
+    intensity *= (0.5 + 0.5 * np.minimum(size_factor, 1.0))
+    
     # Aggregate shading from multiple buildings
     # Use root mean square to avoid overestimating combined shading
-    total_shading = np.sqrt(np.mean(np.array(shading_scores) ** 2))
+    total_shading = np.sqrt(np.mean(intensity ** 2))
     
     # Normalize to 0-1 range
     return min(total_shading, 1.0)
 
 
+def calculate_shading_factors_batch(
+    buildings_gdf: gpd.GeoDataFrame,
+    search_radius: float = 100.0,
+    sun_elevation: float = 45.0,
+    tan_sun: Optional[float] = None
+) -> np.ndarray:
+    """
+    Calculate the shading factor of every building in one pass.
+    
+    Equivalent to calling `calculate_shading_factor` for each building with
+    the buildings whose centroids lie within `search_radius` of its own.
+    Centroids, heights and footprint areas are extracted once into flat
+    arrays, neighbour pairs come from a single STRtree `dwithin` query, and
+    `shading_batch_kernel` (compiled when numba is installed) walks the
+    pairs without any per-building GEOS or Python calls.
+    
+    Parameters
+    ----------
+    buildings_gdf : gpd.GeoDataFrame
+        Buildings with geometries and (optionally) heights
+    search_radius : float
+        Neighbour search radius in meters (default 100m)
+    sun_elevation : float
+        Average sun elevation angle in degrees (default 45°)
+    tan_sun : float, optional
+        Precomputed `sun_tangent(sun_elevation)`; overrides `sun_elevation`
+    
+    Returns
+    -------
+    np.ndarray
+        Shading factor per building, between 0 (no shade) and 1 (full shade)
+    """
+    n = len(buildings_gdf)
+    if tan_sun is None:
+        tan_sun = sun_tangent(sun_elevation)
+    if n == 0 or tan_sun <= 0:
+        return np.zeros(n)
+    
+    arrays = _shading_arrays(buildings_gdf)
+    return _shading_chunk(arrays, 0, n, search_radius, float(tan_sun))
+
+
+def calculate_shading_factors_parallel(
+    buildings_gdf: gpd.GeoDataFrame,
+    search_radius: float = 100.0,
+    sun_elevation: float = 45.0,
+    tan_sun: Optional[float] = None,
+    n_jobs: int = -1
+) -> np.ndarray:
+    """
+    Calculate the shading factor of every building using several threads.
+    
+    Same result as `calculate_shading_factors_batch`. The per-building
+    arrays and the STRtree are built once and shared; the target buildings
+    are split into `n_jobs` contiguous chunks whose neighbour queries and
+    shading kernels run on a thread pool. Targets do not share any output,
+    and both the GEOS queries and the compiled kernel release the GIL.
+    
+    Parameters
+    ----------
+    buildings_gdf : gpd.GeoDataFrame
+        Buildings with geometries and (optionally) heights
+    search_radius : float
+        Neighbour search radius in meters (default 100m)
+    sun_elevation : float
+        Average sun elevation angle in degrees (default 45°)
+    tan_sun : float, optional
+        Precomputed `sun_tangent(sun_elevation)`; overrides `sun_elevation`
+    n_jobs : int
+        Number of worker threads; -1 (default) uses all CPU cores
+    
+    Returns
+    -------
+    np.ndarray
+        Shading factor per building, between 0 (no shade) and 1 (full shade)
+    """
+    n = len(buildings_gdf)
+    if tan_sun is None:
+        tan_sun = sun_tangent(sun_elevation)
+    if n == 0 or tan_sun <= 0:
+        return np.zeros(n)
+    
+    if n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = min(n_jobs, n)
+    
+    arrays = _shading_arrays(buildings_gdf)
+    bounds = np.linspace(0, n, n_jobs + 1).astype(int)
+    
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        chunks = executor.map(
+            lambda start, stop: _shading_chunk(arrays, start, stop, search_radius, float(tan_sun)),
+            bounds[:-1], bounds[1:]
+        )
+        return np.concatenate(list(chunks))
+
+
+def _shading_arrays(buildings_gdf: gpd.GeoDataFrame) -> Tuple:
+    """Flat per-building arrays and centroid STRtree used by the shading kernel."""
+    geoms = np.asarray(buildings_gdf.geometry.values)
+    centroids = shapely.centroid(geoms)
+    cx, cy = shapely.get_x(centroids), shapely.get_y(centroids)
+    areas = shapely.area(geoms)
+    heights = _building_heights(buildings_gdf)
+    
+    return shapely.STRtree(centroids), centroids, cx, cy, heights, areas
+
+
+def _shading_chunk(
+    arrays: Tuple,
+    start: int,
+    stop: int,
+    search_radius: float,
+    tan_sun: float
+) -> np.ndarray:
+    """Shading factors of target buildings start..stop-1 against all buildings."""
+    tree, centroids, cx, cy, heights, areas = arrays
+    
+    # All (target, neighbour) pairs with centroid distance <= search radius
+    targets, neighbors = tree.query(
+        centroids[start:stop], predicate='dwithin', distance=search_radius
+    )
+    
+    # targets are relative to start, so the kernel only sizes this chunk's outputs
+    return load_kernels().shading_batch_kernel(
+        targets, neighbors, cx, cy, heights, areas, tan_sun, start, stop - start
+    )
+
+
 def find_nearby_buildings(
     target_building: Polygon,
     all_buildings: gpd.GeoDataFrame,
     search_radius: float = 100.0
 ) -> gpd.GeoDataFrame:
     """
-    Find buildings within a given radius using spatial search (KD-tree).
+    Find buildings within a given radius using the R-tree spatial index.
     
-    Uses KD-tree spatial index for efficient range queries.
-    Time Complexity: O(log n + m) where m is number of results
+    Candidates are pulled from the GeoDataFrame's cached STRtree (`sindex`)
+    with a bounding-box query around the target, then filtered on exact
+    centroid distance. The index is built once per GeoDataFrame and reused
+    across calls.
+    Time Complexity: O(log n + m) where m is number of candidates
     
     Parameters
     ----------
@@ -116,31 +285,35 @@ def find_nearby_buildings(
     gpd.GeoDataFrame
         Nearby buildings within radius, sorted by distance
     """
-    # Build spatial index using KD-tree
-    spatial_index = SpatialIndex(all_buildings)
-    
     # Get centroid of target building
     target_centroid = target_building.centroid
     
-    # Use KD-tree range query to find buildings within radius
-    nearby_buildings = spatial_index.find_within_radius(target_centroid, radius=search_radius)
-    
-    # If no nearby buildings found, return empty dataframe
-    if len(nearby_buildings) == 0:
-        return nearby_buildings
+    # If there are no buildings, return empty dataframe
+    if len(all_buildings) == 0:
+        return all_buildings.iloc[0:0].assign(distance=np.empty(0))
     
-    # Calculate distances and sort
-    nearby_buildings['distance'] = nearby_buildings.geometry.apply(
-        lambda geom: target_centroid.distance(geom.centroid)
-    )
+    # R-tree query: buildings whose bounding box reaches the search window
+    # (a building's centroid always lies inside its bounding box)
+    cx, cy = target_centroid.x, target_centroid.y
+    search_box = box(cx - search_radius, cy - search_radius, cx + search_radius, cy + search_radius)
+    candidates = np.sort(all_buildings.sindex.query(search_box))
     
-    # Remove self (distance < 1m) and sort by distance
-    nearby_buildings = nearby_buildings[nearby_buildings['distance'] >= 1.0]
-    nearby_buildings = nearby_buildings.sort_values('distance')
+    # Exact centroid distances on the candidates only
+    candidate_geoms = np.asarray(all_buildings.geometry.values)[candidates]
+    distances = shapely.distance(target_centroid, shapely.centroid(candidate_geoms))
     
-    return nearby_buildings
+    # Keep buildings within radius, remove self (distance < 1m), sort by distance
+    within = (distances <= search_radius) & (distances >= 1.0)
+    candidates, distances = candidates[within], distances[within]
+    order = np.argsort(distances, kind='stable')
     
-    return nearby
+    return all_buildings.iloc[candidates[order]].assign(distance=distances[order])
+
+
+@lru_cache(maxsize=4096)
+def _tan_sun(sun_elevation: float) -> float:
+    """Cached tan(sun elevation in degrees), keyed by the exact elevation."""
+    return math.tan(math.radians(sun_elevation))
 
 
 def calculate_shadow_length(
@@ -150,6 +323,9 @@ def calculate_shadow_length(
     """
     Calculate shadow length from a building.
     
+    The tangent comes from `sun_tangent`, which memoizes it, so repeated
+    calls with the same (e.g. hourly) sun positions reuse it.
+    
     Parameters
     ----------
     building_height : float
@@ -162,11 +338,11 @@ def calculate_shadow_length(
     float
         Shadow length in meters
     """
-    if sun_elevation <= 0 or sun_elevation >= 90:
+    tan_sun = sun_tangent(sun_elevation)
+    if tan_sun <= 0:
         return 0.0
     
-    sun_elevation_rad = np.radians(sun_elevation)
-    shadow_length = building_height / np.tan(sun_elevation_rad)
+    shadow_length = building_height / tan_sun
     
     return shadow_length
 
@@ -186,32 +362,20 @@ if __name__ == "__main__":
     print("=" * 70)
     
     # Load processed buildings
-    buildings_gdf = gpd.read_file("data/processed_buildings.json")
+    buildings_gdf = gpd.read_file("data/processed_buildings.json", engine="pyogrio")
     
     print(f"Analyzing shading for {len(buildings_gdf)} buildings...")
     
-    # Build spatial index for efficient neighbor search
-    spatial_idx = SpatialIndex(buildings_gdf)
+    # Sun tangent is shared by every building in the batch
+    tan_sun = sun_tangent(45.0)
     
-    # Calculate shading factors
-    shading_factors = []
-    for idx, building in buildings_gdf.iterrows():
-        nearby = spatial_idx.find_within_radius(
-            building.geometry.centroid,
-            radius=100.0
-        )
-        
-        if len(nearby) > 1:  # Exclude self
-            shading = calculate_shading_factor(
-                building.geometry,
-                building.get('building_height', 10.0),
-                nearby,
-                sun_elevation=45.0
-            )
-        else:
-            shading = 0.0  # No nearby buildings
-        
-        shading_factors.append(shading)
+    # Calculate shading factors for all buildings, split across CPU cores
+    shading_factors = calculate_shading_factors_parallel(
+        buildings_gdf,
+        search_radius=100.0,
+        tan_sun=tan_sun,
+        n_jobs=-1
+    )
     
     buildings_gdf['shading_factor'] = shading_factors
     
@@ -233,33 +397,19 @@ if __name__ == "__main__":
     print("=" * 70)
     
     # Load processed test buildings
-    buildings_gdf = gpd.read_file("data/processed_test_buildings.json")
+    buildings_gdf = gpd.read_file("data/processed_test_buildings.json", engine="pyogrio")
     
     print(f"Analyzing shading for {len(buildings_gdf)} buildings...")
     
-    # Build spatial index for efficient neighbor search
-    spatial_idx = SpatialIndex(buildings_gdf)
+    # Sun tangent is shared by every building in the batch
+    tan_sun = sun_tangent(45.0)
     
-    # Calculate shading factors
-    shading_factors = []
-    for idx, building in buildings_gdf.iterrows():
-        nearby = spatial_idx.find_within_radius(
-            building.geometry.centroid,
-            radius=100.0
-        )
-        
-        if len(nearby) > 1:  # Exclude self
-            # Use full shading calculation
-            shading = calculate_shading_factor(
-                building.geometry,
-                building.get('building_height', 10.0),
-                nearby,
-                sun_elevation=45.0
-            )
-        else:
-            shading = 0.0  # No nearby buildings
-        
-        shading_factors.append(shading)
+    # Calculate shading factors for all buildings in one batch
+    shading_factors = calculate_shading_factors_batch(
+        buildings_gdf,
+        search_radius=100.0,
+        tan_sun=tan_sun
+    )
     
     buildings_gdf['shading_factor'] = shading_factors
     
@@ -6,6 +6,22 @@ Calculates solar energy potential for buildings.
 
 import numpy as np
 from typing import Optional
+from numpy.typing import ArrayLike
+
+
+def load_kernels():
+    """
+    Array kernels module (solar_numba), imported on first use.
+    
+    Importing numba (and compiling the kernels) takes most of a second, so
+    the *_batch functions here and in shading.py call this instead of
+    importing solar_numba at module load.
+    """
+    try:
+        from src import solar_numba
+    except ModuleNotFoundError:
+        import solar_numba
+    return solar_numba
 
 
 def calculate_solar_potential(
@@ -46,6 +62,46 @@ def calculate_solar_potential(
     return energy
 
 
+def calculate_solar_potential_batch(
+    area: ArrayLike,
+    irradiance: ArrayLike,
+    efficiency: float = 0.18,
+    shading_factor: ArrayLike = 0.0
+) -> np.ndarray:
+    """
+    Calculate annual solar energy production potential for many buildings.
+    
+    Same formula as `calculate_solar_potential`, evaluated over whole arrays
+    by the compiled kernel in solar_numba.
+    
+    Parameters
+    ----------
+    area : array-like
+        Roof areas in m²
+    irradiance : array-like
+        Annual solar irradiance in kWh/m²/year
+    efficiency : float
+        Panel efficiency (default 18% = 0.18)
+    shading_factor : array-like
+        Shading factors between 0 (no shade) and 1 (full shade)
+    
+    Returns
+    -------
+    np.ndarray
+        Annual energy production in kWh per building
+    """
+    area = np.asarray(area, dtype=float)
+    irradiance = np.asarray(irradiance, dtype=float)
+    shading_factor = np.asarray(shading_factor, dtype=float)
+    
+    # Same validation as the scalar version: only producing roofs are checked
+    producing = (area > 0) & (irradiance > 0)
+    if np.any(producing & ~((shading_factor >= 0) & (shading_factor <= 1))):
+        raise ValueError("Shading factor must be between 0 and 1")
+    
+    return load_kernels().solar_potential_kernel(area, irradiance, efficiency, shading_factor)
+
+
 def calculate_roi(
     energy_kwh: float,
     energy_price: float = 0.25,
@@ -124,6 +180,74 @@ def calculate_payback_period(
     return cost / annual_revenue
 
 
+def calculate_roi_batch(
+    energy_kwh: ArrayLike,
+    energy_price: float = 0.25,
+    installation_cost_per_m2: float = 200,
+    area: ArrayLike = 0
+) -> np.ndarray:
+    """
+    Calculate Return on Investment (ROI) for many buildings.
+    
+    Same formula and edge cases as `calculate_roi` (0% without a roof area
+    or installation cost), broadcast over whole arrays.
+    
+    Parameters
+    ----------
+    energy_kwh : array-like
+        Annual energy production in kWh
+    energy_price : float
+        Energy price per kWh (default €0.25)
+    installation_cost_per_m2 : float
+        Installation cost per m² (default €200)
+    area : array-like
+        Roof areas in m²
+    
+    Returns
+    -------
+    np.ndarray
+        ROI as a percentage per building
+    """
+    energy_kwh = np.asarray(energy_kwh, dtype=float)
+    area = np.asarray(area, dtype=float)
+    
+    return load_kernels().roi_kernel(energy_kwh, energy_price, installation_cost_per_m2, area)
+
+
+def calculate_payback_batch(
+    energy_kwh: ArrayLike,
+    energy_price: float = 0.25,
+    installation_cost_per_m2: float = 200,
+    area: ArrayLike = 0
+) -> np.ndarray:
+    """
+    Calculate payback period in years for many buildings.
+    
+    Same formula and edge cases as `calculate_payback_period` (infinite
+    without a roof area or revenue), broadcast over whole arrays.
+    
+    Parameters
+    ----------
+    energy_kwh : array-like
+        Annual energy production in kWh
+    energy_price : float
+        Energy price per kWh
+    installation_cost_per_m2 : float
+        Installation cost per m²
+    area : array-like
+        Roof areas in m²
+    
+    Returns
+    -------
+    np.ndarray
+        Payback period in years per building
+    """
+    energy_kwh = np.asarray(energy_kwh, dtype=float)
+    area = np.asarray(area, dtype=float)
+    
+    return load_kernels().payback_kernel(energy_kwh, energy_price, installation_cost_per_m2, area)
+
+
 # ============================================================================
 # Main execution
 # ============================================================================
@@ -142,36 +266,31 @@ if __name__ == "__main__":
     print("=" * 70)
     
     # Load processed buildings with solar data
-    buildings_gdf = gpd.read_file("data/processed_buildings.json")
+    buildings_gdf = gpd.read_file("data/processed_buildings.json", engine="pyogrio")
     
     print(f"Calculating solar potential for {len(buildings_gdf)} buildings...")
     
     # Calculate solar potential
     # Note: solar_irradiance is E_y from PVGIS (kWh/m²/year equivalent)
-    buildings_gdf['solar_potential_kwh'] = buildings_gdf.apply(
-        lambda row: calculate_solar_potential(
-            area=row.get('roof_area_m2', 0),
-            irradiance=row.get('solar_irradiance', 0) if row.get('solar_irradiance', 0) > 0 else 1000,
-            efficiency=0.18,
-            shading_factor=row.get('shading_factor', 0)
-        ), axis=1
+    irradiance = np.asarray(buildings_gdf.get('solar_irradiance', 0), dtype=float)
+    buildings_gdf['solar_potential_kwh'] = calculate_solar_potential_batch(
+        area=buildings_gdf.get('roof_area_m2', 0),
+        irradiance=np.where(irradiance > 0, irradiance, 1000),
+        efficiency=0.18,
+        shading_factor=buildings_gdf.get('shading_factor', 0)
     )
     
     # Calculate ROI metrics
-    buildings_gdf['annual_savings_eur'] = buildings_gdf.apply(
-        lambda row: calculate_roi(
-            energy_kwh=row.get('solar_potential_kwh', 0),
-            energy_price=0.25
-        ), axis=1
+    buildings_gdf['annual_savings_eur'] = calculate_roi_batch(
+        energy_kwh=buildings_gdf['solar_potential_kwh'],
+        energy_price=0.25
     )
     
-    buildings_gdf['payback_period_years'] = buildings_gdf.apply(
-        lambda row: calculate_payback_period(
-            energy_kwh=row.get('solar_potential_kwh', 0),
-            energy_price=0.25,
-            installation_cost_per_m2=200,
-            area=row.get('roof_area_m2', 0)
-        ), axis=1
+    buildings_gdf['payback_period_years'] = calculate_payback_batch(
+        energy_kwh=buildings_gdf['solar_potential_kwh'],
+        energy_price=0.25,
+        installation_cost_per_m2=200,
+        area=buildings_gdf.get('roof_area_m2', 0)
     )
     
     # Save results
@@ -193,36 +312,31 @@ if __name__ == "__main__":
     print("=" * 70)
     
     # Load processed test buildings
-    buildings_gdf = gpd.read_file("data/processed_test_buildings.json")
+    buildings_gdf = gpd.read_file("data/processed_test_buildings.json", engine="pyogrio")
     
     print(f"Calculating solar potential for {len(buildings_gdf)} buildings...")
     
     # Calculate solar potential
     # Note: solar_irradiance is E_y from PVGIS (kWh/m²/year equivalent)
-    buildings_gdf['solar_potential_kwh'] = buildings_gdf.apply(
-        lambda row: calculate_solar_potential(
-            area=row.get('roof_area_m2', 0),
-            irradiance=row.get('solar_irradiance', 0) if row.get('solar_irradiance', 0) > 0 else 1000,
-            efficiency=0.18,
-            shading_factor=row.get('shading_factor', 0.1)  # Assume small default shading
-        ), axis=1
+    irradiance = np.asarray(buildings_gdf.get('solar_irradiance', 0), dtype=float)
+    buildings_gdf['solar_potential_kwh'] = calculate_solar_potential_batch(
+        area=buildings_gdf.get('roof_area_m2', 0),
+        irradiance=np.where(irradiance > 0, irradiance, 1000),
+        efficiency=0.18,
+        shading_factor=buildings_gdf.get('shading_factor', 0.1)  # Assume small default shading
     )
     
     # Calculate ROI metrics
-    buildings_gdf['annual_savings_eur'] = buildings_gdf.apply(
-        lambda row: calculate_roi(
-            energy_kwh=row.get('solar_potential_kwh', 0),
-            energy_price=0.25
-        ), axis=1
+    buildings_gdf['annual_savings_eur'] = calculate_roi_batch(
+        energy_kwh=buildings_gdf['solar_potential_kwh'],
+        energy_price=0.25
     )
     
-    buildings_gdf['payback_period_years'] = buildings_gdf.apply(
-        lambda row: calculate_payback_period(
-            energy_kwh=row.get('solar_potential_kwh', 0),
-            energy_price=0.25,
-            installation_cost_per_m2=200,
-            area=row.get('roof_area_m2', 0)
-        ), axis=1
+    buildings_gdf['payback_period_years'] = calculate_payback_batch(
+        energy_kwh=buildings_gdf['solar_potential_kwh'],
+        energy_price=0.25,
+        installation_cost_per_m2=200,
+        area=buildings_gdf.get('roof_area_m2', 0)
     )
     
     # Save results
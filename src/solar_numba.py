@@ -0,0 +1,147 @@
+"""
+Compiled Solar Kernels
+Array versions of the scalar formulas in solar.py and shading.py.
+
+With numba installed the kernels are compiled NumPy ufuncs, so they
+broadcast over arrays of buildings without per-element Python calls.
+Without numba they fall back to equivalent NumPy expressions.
+
+The shading kernel works on flat per-building arrays (centroid x/y,
+height, footprint area) plus a list of (target, neighbour) index pairs,
+so a whole neighbourhood scan runs without GEOS or per-row Python calls.
+
+Kernels are purely numeric: input validation (e.g. shading factor range)
+stays in the Python wrappers in solar.py and shading.py.
+"""
+
+import numpy as np
+
+# Optional import for compiled kernels
+try:
+    from numba import njit, vectorize
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+
+    @vectorize(['f8(f8, f8, f8, f8)'], nopython=True, cache=True)
+    def solar_potential_kernel(area, irradiance, efficiency, shading_factor):
+        """E = A × H × η × (1 - S), or 0 for non-positive area/irradiance."""
+        if area <= 0 or irradiance <= 0:
+            return 0.0
+        return area * irradiance * efficiency * (1 - shading_factor)
+
+    @vectorize(['f8(f8, f8, f8, f8)'], nopython=True, cache=True)
+    def roi_kernel(energy_kwh, energy_price, installation_cost_per_m2, area):
+        """ROI (%) = (E × Price - Cost) / Cost × 100, or 0 without a cost."""
+        if area <= 0:
+            return 0.0
+        cost = area * installation_cost_per_m2
+        if cost == 0:
+            return 0.0
+        return (energy_kwh * energy_price - cost) / cost * 100
+
+    @vectorize(['f8(f8, f8, f8, f8)'], nopython=True, cache=True)
+    def payback_kernel(energy_kwh, energy_price, installation_cost_per_m2, area):
+        """Payback (years) = Cost / (E × Price), or inf without revenue."""
+        if area <= 0 or energy_kwh <= 0:
+            return np.inf
+        annual_revenue = energy_kwh * energy_price
+        if annual_revenue == 0:
+            return np.inf
+        return area * installation_cost_per_m2 / annual_revenue
+
+    @njit(cache=True, nogil=True, error_model='numpy')
+    def shading_batch_kernel(targets, neighbors, cx, cy, heights, areas, tan_sun,
+                             start, n_targets):
+        """
+        RMS shading factor per building from (target, neighbour) pairs.
+        
+        Same rules as shading.calculate_shading_factor: a neighbour at least
+        1 m away, taller than the target and whose shadow reaches it adds
+        an intensity; intensities are combined by root mean square.
+        
+        Targets are buildings start..start+n_targets-1, given relative to
+        `start` in `targets`; neighbours index the full arrays. Only the
+        n_targets results are allocated and returned.
+        """
+        sum_sq = np.zeros(n_targets)
+        count = np.zeros(n_targets)
+        for p in range(targets.shape[0]):
+            t = targets[p]
+            i = t + start
+            j = neighbors[p]
+            distance = np.hypot(cx[j] - cx[i], cy[j] - cy[i])
+            height_diff = heights[j] - heights[i]
+            shadow_length = heights[j] / tan_sun
+            if not (distance >= 1 and height_diff > 0 and distance <= shadow_length):
+                continue
+            intensity = min((height_diff / 50.0) * (1 - distance / shadow_length), 1.0)
+            size_factor = min(areas[j] / areas[i], 2.0)
+            intensity *= 0.5 + 0.5 * min(size_factor, 1.0)
+            sum_sq[t] += intensity * intensity
+            count[t] += 1
+        
+        shading = np.zeros(n_targets)
+        for t in range(n_targets):
+            if count[t] > 0:
+                shading[t] = min(np.sqrt(sum_sq[t] / count[t]), 1.0)
+        return shading
+
+else:
+
+    def solar_potential_kernel(area, irradiance, efficiency, shading_factor):
+        """E = A × H × η × (1 - S), or 0 for non-positive area/irradiance."""
+        area, irradiance = np.asarray(area, dtype=float), np.asarray(irradiance, dtype=float)
+        energy = area * irradiance * efficiency * (1 - np.asarray(shading_factor, dtype=float))
+        return np.where((area <= 0) | (irradiance <= 0), 0.0, energy)
+
+    def roi_kernel(energy_kwh, energy_price, installation_cost_per_m2, area):
+        """ROI (%) = (E × Price - Cost) / Cost × 100, or 0 without a cost."""
+        area = np.asarray(area, dtype=float)
+        cost = area * installation_cost_per_m2
+        safe_cost = np.where(cost == 0, 1.0, cost)
+        roi = (np.asarray(energy_kwh, dtype=float) * energy_price - cost) / safe_cost * 100
+        return np.where((area <= 0) | (cost == 0), 0.0, roi)
+
+    def payback_kernel(energy_kwh, energy_price, installation_cost_per_m2, area):
+        """Payback (years) = Cost / (E × Price), or inf without revenue."""
+        area, energy_kwh = np.asarray(area, dtype=float), np.asarray(energy_kwh, dtype=float)
+        annual_revenue = energy_kwh * energy_price
+        no_revenue = (area <= 0) | (energy_kwh <= 0) | (annual_revenue == 0)
+        safe_revenue = np.where(annual_revenue == 0, 1.0, annual_revenue)
+        return np.where(no_revenue, np.inf, area * installation_cost_per_m2 / safe_revenue)
+
+    def shading_batch_kernel(targets, neighbors, cx, cy, heights, areas, tan_sun,
+                             start, n_targets):
+        """
+        RMS shading factor per building from (target, neighbour) pairs.
+        
+        Same rules as shading.calculate_shading_factor: a neighbour at least
+        1 m away, taller than the target and whose shadow reaches it adds
+        an intensity; intensities are combined by root mean square.
+        
+        Targets are buildings start..start+n_targets-1, given relative to
+        `start` in `targets`; neighbours index the full arrays. Only the
+        n_targets results are allocated and returned.
+        """
+        i = targets + start
+        distance = np.hypot(cx[neighbors] - cx[i], cy[neighbors] - cy[i])
+        height_diff = heights[neighbors] - heights[i]
+        shadow_length = heights[neighbors] / tan_sun
+        casts_shadow = (distance >= 1) & (height_diff > 0) & (distance <= shadow_length)
+        
+        t, j = targets[casts_shadow], neighbors[casts_shadow]
+        intensity = (height_diff[casts_shadow] / 50.0) * (1 - distance[casts_shadow] / shadow_length[casts_shadow])
+        intensity = np.minimum(intensity, 1.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            size_factor = np.minimum(areas[j] / areas[t + start], 2.0)
+        intensity *= 0.5 + 0.5 * np.minimum(size_factor, 1.0)
+        
+        sum_sq = np.bincount(t, weights=intensity ** 2, minlength=n_targets)
+        count = np.bincount(t, minlength=n_targets)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            shading = np.minimum(np.sqrt(sum_sq / count), 1.0)
+        return np.where(count > 0, shading, 0.0)
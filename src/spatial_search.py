@@ -3,24 +3,82 @@ Spatial Search Modules
 this module's searching function to manipulate and retrieve solar suitability. 
 
 1- SpatialIndex: uses Kd-tree algorithms to retrieve buildings using this functionality 
-  -find_nearest_neighbors
-  -find_within_radius
+  -find_nearest_neighbors (KD-tree over the centroids)
+  -find_nearest_neighbors_batch (KD-tree over the centroids)
+  -find_within_radius (STRtree over the footprints)
+  -find_within_radius_batch (STRtree over the footprints)
+  -find_by_id
   
   2- other searching functions
    - binary_search_building_by_score
+   - quicksort_buildings
+   - linear_search_building_by_id
    - find_top_k_buildings
 
 """
 from src.data_acquisition import fetch_pdok_buildings
+import hashlib
+import os
+import pickle
+import weakref
+from functools import cached_property
+from pathlib import Path
 import numpy as np
+import shapely
 import pandas as pd 
 import geopandas as gpd
 from shapely.geometry import Point, Polygon
-from typing import List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 from scipy.spatial import KDTree
 from scipy.spatial import ckdtree
 
 
+# Suggested location for SpatialIndex(..., cache_dir=...) KD-tree pickles
+KDTREE_CACHE_DIR = Path.home() / ".cache" / "solar_panel"
+
+
+def _load_or_build_kdtree(coordinates: np.ndarray, cache_dir: Optional[Path] = None) -> KDTree:
+    """
+    Build a KD-tree, or load a previously pickled one for the same points.
+    
+    The cache file name is a hash of the coordinate bytes; a loaded tree is
+    only used if its points are identical to `coordinates`.
+    """
+    if cache_dir is None:
+        return KDTree(coordinates)
+
+    coordinates = np.ascontiguousarray(coordinates, dtype=float)
+    key = hashlib.blake2b(coordinates.tobytes(), digest_size=8)
+    key.update(str(coordinates.shape).encode())
+    cache_path = Path(cache_dir) / f"kdtree_{key.hexdigest()}.pkl"
+
+    if cache_path.exists():
+        try:
+            with open(cache_path, "rb") as f:
+                tree = pickle.load(f)
+            if isinstance(tree, KDTree) and np.array_equal(tree.data, coordinates):
+                return tree
+        except Exception:
+            pass  # unreadable or incompatible (e.g. other scipy) entry: rebuild and overwrite it
+
+    tree = KDTree(coordinates)
+
+    # Write to a temporary file first so readers never see a partial pickle;
+    # the cache is only a speed-up, so a failed write just skips it
+    tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(tree, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+
+    return tree
+
 
 #=======================================
 # spatial index module
@@ -31,12 +89,19 @@ class SpatialIndex:
     The KD-tree algorithm organizes points in k-dimensional space (2D for geographic coordinates)
     for efficient nearest neighbor and range searches.
     
+    Radius searches against the footprints themselves use a shapely STRtree
+    (R-tree over the polygon bounding boxes), so a building counts as within
+    range when any part of it is, not only its centroid.
+    
+    Both trees are built lazily on the first query, so an index that is
+    created (or copied) but never queried costs only the centroid extraction.
+    
     Time Complexity:
     - Construction: O(n log n)
     - Query: O(log n) average case
     """
     
-    def __init__(self, buildings_gdf: gpd.GeoDataFrame):
+    def __init__(self, buildings_gdf: gpd.GeoDataFrame, cache_dir: Optional[Path] = None):
         """
         Initialize spatial index with building centroids.
         
@@ -44,23 +109,51 @@ class SpatialIndex:
         ----------
         buildings_gdf : gpd.GeoDataFrame
             GeoDataFrame containing building geometries
+        cache_dir : Path, optional
+            Directory for pickled KD-trees (e.g. `KDTREE_CACHE_DIR`). When
+            given, a tree built for the same centroids in an earlier run is
+            loaded instead of rebuilt. No disk cache is used by default.
         """
         self.buildings_gdf = buildings_gdf.copy()
+        self.cache_dir = cache_dir
+        self._extract_centroids()
+    
+    def _extract_centroids(self) -> None:
+        """Compute the centroid column and coordinate array from the geometries."""
+        # Extract centroids for KD-tree in bulk (one GEOS call per step)
+        self.geometries = np.asarray(self.buildings_gdf.geometry.values)
+        centroids = shapely.centroid(self.geometries)
+        x = shapely.get_x(centroids)
+        y = shapely.get_y(centroids)
         
-        # Extract centroids for KD-tree
-        self.buildings_gdf['centroid'] = self.buildings_gdf.geometry.centroid
-        self.buildings_gdf['x'] = self.buildings_gdf.centroid.x
-        self.buildings_gdf['y'] = self.buildings_gdf.centroid.y
-        
-         # Build KD-tree from centroids
-        x = self.buildings_gdf['x'].to_numpy(dtype=float)
-        y = self.buildings_gdf['y'].to_numpy(dtype=float)
-        self.coordinates = np.column_stack((x, y))
-        
-        self.kdtree = KDTree(self.coordinates)
+        self.buildings_gdf['centroid'] = gpd.GeoSeries(
+            centroids, index=self.buildings_gdf.index, crs=self.buildings_gdf.crs
+        )
         
+        # Centroids as one contiguous (n, 2) array: the KD-tree is built on it
+        # and query distances are computed from it, so no x/y columns are stored
+        self.coords = np.ascontiguousarray(np.column_stack((x, y)), dtype=np.float64)
+        self.coordinates = self.coords
+    
+    @cached_property
+    def kdtree(self) -> KDTree:
+        """KD-tree over the building centroids, built on first access."""
+        return _load_or_build_kdtree(self.coords, self.cache_dir)
+    
+    @cached_property
+    def strtree(self) -> shapely.STRtree:
+        """STRtree over the footprints for exact distance/range predicates, built on first access."""
+        return shapely.STRtree(self.geometries)
+    
+    def _reset_index(self) -> None:
+        """
+        Drop the trees after `buildings_gdf` geometries were changed in place.
         
-
+        Centroids are recomputed now; the trees are rebuilt on next access.
+        """
+        self.__dict__.pop('kdtree', None)
+        self.__dict__.pop('strtree', None)
+        self._extract_centroids()
         
     def find_nearest_neighbors(
         self,
@@ -86,16 +179,48 @@ class SpatialIndex:
             k nearest buildings sorted by distance
         """
         
-        query_point = np.array([point.x, point.y])
-        
-        # KD-tree query: finds k nearest neighbors
-        distances, indices = self.kdtree.query(query_point, k=k)
+        distances, indices = self.find_nearest_neighbors_batch([[point.x, point.y]], k=k)
         
         # Return corresponding buildings
-        nearest_buildings = self.buildings_gdf.iloc[indices].copy()
-        nearest_buildings['distance'] = distances
+        return self.buildings_gdf.iloc[np.atleast_1d(indices[0])].assign(distance=distances[0])
+    
+    def find_nearest_neighbors_batch(
+        self,
+        points,
+        k: int = 5,
+        workers: int = -1
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k nearest buildings to many query points in one call.
+        
+        All query points go to the KD-tree together; `workers=-1` lets SciPy
+        split the traversal over all cores instead of one Python call (and
+        one thread) per point.
         
-        return nearest_buildings
+        Algorithm: batched KD-tree nearest neighbor search
+        Time Complexity: O(m log n) average case for m query points
+        
+        Parameters
+        ----------
+        points : array-like
+            Query points: an (m, 2) coordinate array or a sequence of Points
+        k : int
+            Number of nearest neighbors per query point
+        workers : int
+            Number of threads for the query; -1 (default) uses all cores
+        
+        Returns
+        -------
+        distances : np.ndarray
+            Distances to the neighbors, nearest first (shape (m,) for k=1,
+            (m, k) otherwise)
+        indices : np.ndarray
+            Row positions (into `buildings_gdf`) of the neighbors
+        """
+        query_points = _as_coordinates(points)
+        
+        # KD-tree query: finds k nearest neighbors of every point
+        return self.kdtree.query(query_points, k=k, workers=workers)
     
     def find_within_radius(
         self,
@@ -103,9 +228,9 @@ class SpatialIndex:
         radius: float
     ) -> gpd.GeoDataFrame:
         """
-        Find all buildings within a given radius using KD-tree range query.
+        Find all buildings whose footprint lies within a given radius.
         
-        Algorithm: KD-tree range search
+        Algorithm: STRtree range search with a 'dwithin' predicate
         Time Complexity: O(log n + m) where m is number of results
         
         Parameters
@@ -118,37 +243,99 @@ class SpatialIndex:
         Returns
         -------
         gpd.GeoDataFrame
-            Buildings within radius
+            Buildings within radius with a 'distance' column (from the point
+            to the footprint, 0 if the point is inside), sorted by distance
         """
-        query_point = np.array([point.x, point.y])
-        
-        # KD-tree range query: finds all points within radius
-        indices = self.kdtree.query_ball_point(query_point, radius)
-        result = self.buildings_gdf.iloc[indices].copy()
-        if result.empty:
+        # STRtree range query: bounding-box candidates, exact distance check in GEOS
+        indices = self.strtree.query(point, predicate='dwithin', distance=radius)
+        if len(indices) == 0:
            print("No buildings found within radius.")
-        return result
-
+        
+        # Exact distances to the footprints, nearest first
+        distances = shapely.distance(point, self.geometries[indices])
+        order = np.argsort(distances, kind='stable')
+        return self.buildings_gdf.iloc[indices[order]].assign(distance=distances[order])
 
+    def find_within_radius_batch(
+        self,
+        points,
+        radius: float
+    ) -> List[np.ndarray]:
+        """
+        Find buildings within a radius of many query points in one call.
+        
+        Same rule as `find_within_radius` (distance to the footprint, not
+        the centroid), but all query points go to the STRtree together, so
+        the search runs in GEOS instead of one Python call per point.
         
-        # Return buildings within radius
-        nearby_buildings = self.buildings_gdf.iloc[indices].copy()
+        Algorithm: bulk STRtree range search with a 'dwithin' predicate
+        Time Complexity: O(m (log n + r)) for m query points
         
-        # Calculate actual distances
-        nearby_buildings['distance'] = nearby_buildings.apply(
-            lambda row: point.distance(row.centroid),
-            axis=1
+        Parameters
+        ----------
+        points : array-like
+            Query points: an (m, 2) coordinate array or a sequence of Points
+        radius : float
+            Search radius in coordinate units (meters for projected CRS)
+        
+        Returns
+        -------
+        list of np.ndarray
+            For each query point, the row positions (into `buildings_gdf`)
+            of buildings within the radius, in ascending order
+        """
+        query_points = _as_coordinates(points)
+        if len(query_points) == 0:
+            return []
+        
+        # (query, building) index pairs, grouped per query point
+        query_idx, tree_idx = self.strtree.query(
+            shapely.points(query_points), predicate='dwithin', distance=radius
         )
-        return nearby_buildings.sort_values('distance')
+        order = np.lexsort((tree_idx, query_idx))
+        splits = np.searchsorted(query_idx[order], np.arange(1, len(query_points)))
+        return np.split(tree_idx[order].astype(np.intp), splits)
+    
+    def find_by_id(self, building_id: Any) -> Optional[gpd.GeoDataFrame]:
+        """
+        Find a building by its ID using a hashed ID index.
+        
+        Time Complexity: O(1) average case (index built once per SpatialIndex)
+        
+        Parameters
+        ----------
+        building_id : Any
+            Value of the building_id column to look up
+        
+        Returns
+        -------
+        gpd.GeoDataFrame or None
+            Single-row GeoDataFrame, or None if the ID is not present
+        """
+        return linear_search_building_by_id(self.buildings_gdf, building_id)
+
+
+def _as_coordinates(points) -> np.ndarray:
+    """Query points as an (m, 2) float array; geometries are reduced to centroids."""
+    points = np.asarray(points)
+    if points.dtype == object:
+        centroids = shapely.centroid(points)
+        return np.column_stack((shapely.get_x(centroids), shapely.get_y(centroids)))
+    return points.astype(float).reshape(-1, 2)
 
 
 def binary_search_building_by_score(
     buildings_gdf: gpd.GeoDataFrame,
     target_score: float,
     score_column: str = "suitability_score"
-) -> gpd.GeoDataFrame:
+) -> Optional[int]:
     """
-    return geo dataframe
+    Find the building whose score is closest to a target score.
+    
+    Algorithm: binary search (np.searchsorted) on the ascending scores,
+    then a comparison of the two neighbours of the insertion point
+    Time Complexity: O(log n) for input already sorted by score,
+    O(n log n) otherwise (positions are argsorted first)
 
     Requires: buildings_gdf must contain score_column.
 
@@ -162,35 +349,182 @@ def binary_search_building_by_score(
 
     score_column: str
       a sutability score colunm in the gpd.GeoDataFrame
+
+    Returns
+    -------
+    int or None
+        Row position (for `buildings_gdf.iloc`) of the closest score; the
+        lower score wins a tie. None if there are no scored buildings.
     """
     if buildings_gdf.empty:
-        # return an empty GeoDataFrame with the same schema
-        return buildings_gdf.iloc[0:0].copy()
+        return None
+
+    scores = buildings_gdf[score_column].to_numpy(dtype=float)
+
+    # Binary search needs ascending scores: sort positions only if needed
+    # (missing scores sort last and are excluded)
+    if np.all(scores[:-1] <= scores[1:]):
+        order = None
+    else:
+        order = np.argsort(scores, kind='stable')
+        scores = scores[order]
+    n_valid = len(scores) - int(np.isnan(scores).sum())
+    if n_valid == 0:
+        return None
+    scores = scores[:n_valid]
+
+    # Closest of the scores on either side of the insertion point
+    pos = int(np.searchsorted(scores, target_score))
+    if pos == n_valid or (pos > 0 and target_score - scores[pos - 1] <= scores[pos] - target_score):
+        pos -= 1
+
+    return pos if order is None else int(order[pos])
+
+
+
+# Stable ascending score orders, one per live GeoDataFrame and score column.
+# Keyed by id(frame); an entry is reused only while the score bytes hash the same.
+_SCORE_ORDER_CACHE: Dict[Tuple[int, str], Tuple[bytes, np.ndarray, int]] = {}
+
+
+def _score_order(
+    buildings_gdf: gpd.GeoDataFrame,
+    score_column: str
+) -> Tuple[np.ndarray, int]:
+    """Cached stable ascending argsort of `score_column` (NaN last) and its count of non-NaN scores."""
+    scores = buildings_gdf[score_column].to_numpy(dtype=float)
+    digest = hashlib.blake2b(scores.tobytes(), digest_size=16).digest()
+    key = (id(buildings_gdf), score_column)
+    cached = _SCORE_ORDER_CACHE.get(key)
+    if cached is None:
+        weakref.finalize(buildings_gdf, _SCORE_ORDER_CACHE.pop, key, None)
+    if cached is None or cached[0] != digest:
+        order = np.argsort(scores, kind='stable')
+        cached = (digest, order, len(scores) - int(np.isnan(scores).sum()))
+        _SCORE_ORDER_CACHE[key] = cached
+    return cached[1], cached[2]
+
+
+def quicksort_buildings(
+    buildings_gdf: gpd.GeoDataFrame,
+    ascending: bool = False,
+    score_column: str = 'suitability_score'
+) -> gpd.GeoDataFrame:
+    """
+    Sort buildings by score using one cached, stable NumPy argsort.
+    
+    Algorithm: stable np.argsort (timsort) of the scores, computed once per
+    GeoDataFrame and reused for both directions until the scores change;
+    the descending order is derived from it in O(n).
+    Time Complexity: O(n log n) first call, O(n) for later calls
+    
+    Only the score column is sorted; the resulting order is applied to the
+    whole GeoDataFrame (geometry included) with a single positional take.
+    Equal scores keep their input order and missing scores are placed last,
+    in both directions.
+    
+    Parameters
+    ----------
+    buildings_gdf : gpd.GeoDataFrame
+        Buildings to sort
+    ascending : bool
+        Sort ascending if True, descending (best first) if False
+    score_column : str
+        Column to sort by
+    
+    Returns
+    -------
+    gpd.GeoDataFrame
+        Buildings sorted by score
+    """
+    if score_column not in buildings_gdf.columns:
+        raise KeyError(f"Column '{score_column}' not found")
 
-    # Ensure sorted input for binary search
-    gdf = buildings_gdf.sort_values(score_column).reset_index(drop=True)
-    scores = gdf[score_column].values
+    order, n_valid = _score_order(buildings_gdf, score_column)
+    if ascending:
+        return buildings_gdf.iloc[order]
 
-    left, right = 0, len(scores) - 1
-    closest_idx = 0
-    min_diff = float("inf")
+    # Descending: reverse the runs of equal scores, but keep each run in
+    # input order (a plain order[::-1] would reverse ties too)
+    valid = order[:n_valid]
+    sorted_scores = buildings_gdf[score_column].to_numpy(dtype=float)[valid]
+    starts = np.flatnonzero(np.diff(sorted_scores, prepend=np.nan) != 0)[::-1]
+    lengths = np.diff(starts[::-1], append=n_valid)[::-1]
+    run_offsets = np.cumsum(lengths) - lengths
+    positions = np.repeat(starts - run_offsets, lengths) + np.arange(n_valid)
 
-    while left <= right:
-        mid = (left + right) // 2
-        diff = abs(scores[mid] - target_score)
+    return buildings_gdf.iloc[np.concatenate((valid[positions], order[n_valid:]))]
 
-        if diff < min_diff:
-            min_diff = diff
-            closest_idx = mid
 
-        if scores[mid] < target_score:
-            left = mid + 1
-        elif scores[mid] > target_score:
-            right = mid - 1
-        else:
-            break  # exact match
+# Hashed ID indexes (ID value -> row positions), one per live GeoDataFrame.
+# Keyed by id(frame); an entry is dropped when its frame is garbage collected.
+_ID_INDEX_CACHE: Dict[Tuple[int, str], Tuple[pd.Index, int]] = {}
+
+
+def _building_id_index(
+    buildings_gdf: gpd.GeoDataFrame,
+    id_column: str,
+    refresh: bool = False
+) -> pd.Index:
+    """Cached hash index over `id_column`, rebuilt if the frame length changed."""
+    key = (id(buildings_gdf), id_column)
+    cached = _ID_INDEX_CACHE.get(key)
+    if cached is None:
+        weakref.finalize(buildings_gdf, _ID_INDEX_CACHE.pop, key, None)
+    if refresh or cached is None or cached[1] != len(buildings_gdf):
+        cached = (pd.Index(buildings_gdf[id_column].to_numpy()), len(buildings_gdf))
+        _ID_INDEX_CACHE[key] = cached
+    return cached[0]
+
+
+def linear_search_building_by_id(
+    buildings_gdf: gpd.GeoDataFrame,
+    building_id: Any,
+    id_column: str = 'building_id'
+) -> Optional[gpd.GeoDataFrame]:
+    """
+    Find a building by its ID.
+    
+    Algorithm: hash lookup. The first call on a GeoDataFrame builds a hash
+    index of its ID column (one O(n) pass); later calls on the same frame
+    reuse it, replacing a linear scan per lookup. IDs that are not in the
+    index are confirmed with one vectorized scan, so in-place edits of the
+    ID column are still found.
+    Time Complexity: O(1) average case per found ID, O(n) for a missing ID
     
-    return gdf.iloc[[closest_idx]]
+    Parameters
+    ----------
+    buildings_gdf : gpd.GeoDataFrame
+        Buildings to search
+    building_id : Any
+        ID value to look up
+    id_column : str
+        Column holding building IDs
+    
+    Returns
+    -------
+    gpd.GeoDataFrame or None
+        Single-row GeoDataFrame (first match), or None if not found
+    """
+    if buildings_gdf.empty:
+        return None
+
+    if id_column not in buildings_gdf.columns:
+        raise KeyError(f"Column '{id_column}' not found")
+
+    positions = _building_id_index(buildings_gdf, id_column).get_indexer_for([building_id])
+    positions = positions[positions >= 0]
+    if len(positions) > 0 and buildings_gdf[id_column].iat[positions[0]] == building_id:
+        return buildings_gdf.iloc[positions[:1]]
+
+    # Miss (or stale hit after an in-place ID edit): confirm with a vectorized
+    # scan and refresh the index if the frame has changed
+    matches = np.flatnonzero(buildings_gdf[id_column].to_numpy() == building_id)
+    if len(matches) == 0:
+        return None
+
+    _building_id_index(buildings_gdf, id_column, refresh=True)
+    return buildings_gdf.iloc[matches[:1]]
 
 
    
@@ -200,13 +534,15 @@ def find_top_k_buildings(
     score_column: str = 'suitability_score'
 ) -> gpd.GeoDataFrame:
     """
-    Find top k buildings using heap-based selection (via pandas).
+    Find top k buildings using quickselect partitioning.
     
-    Algorithm: Heap-based partial sort (nth-element)
-    Time Complexity: O(n log k)
-    Space Complexity: O(k)
+    Algorithm: introselect (np.partition) to find the k-th best score,
+    then a stable sort of only the k winners
+    Time Complexity: O(n + k log k)
+    Space Complexity: O(n) for the score array
     
-    More efficient than full sort when k << n.
+    More efficient than full sort when k << n. As with `DataFrame.nlargest`,
+    ties keep input order and buildings without a score come last.
     
     Parameters
     ----------
@@ -228,6 +564,22 @@ def find_top_k_buildings(
     if score_column not in buildings_gdf.columns:
         raise KeyError(f"Column '{score_column}' not found")
 
-    return buildings_gdf.nlargest(k, score_column)
+    # Missing scores rank last
+    scores = buildings_gdf[score_column].to_numpy(dtype=float)
+    scores = np.where(np.isnan(scores), -np.inf, scores)
+    n = len(scores)
+    candidates = np.arange(n)
+
+    if k < n:
+        # O(n) selection of the k-th best score, then everything above it
+        # plus the earliest rows tied with it
+        kth_score = np.partition(scores, n - k)[n - k]
+        above = np.flatnonzero(scores > kth_score)
+        tied = np.flatnonzero(scores == kth_score)[:k - len(above)]
+        candidates = np.sort(np.concatenate([above, tied]))
+
+    # O(k log k) stable sort of the winners only
+    order = candidates[np.argsort(-scores[candidates], kind='stable')]
+    return buildings_gdf.iloc[order]
 
 
@@ -6,7 +6,7 @@ Helper functions for data validation, coordinate transformations, and file I/O.
 import geopandas as gpd
 import json
 from pathlib import Path
-from typing import Union, Dict, Any
+from typing import Union, Dict, Any, Optional
 import logging
 
 
@@ -93,6 +93,9 @@ def load_geojson(filepath: Union[str, Path]) -> gpd.GeoDataFrame:
     """
     Load GeoJSON file into GeoDataFrame.
     
+    Uses the pyogrio engine, which reads whole columns (geometries as WKB)
+    in C instead of building each feature in Python.
+    
     Parameters
     ----------
     filepath : str or Path
@@ -103,7 +106,55 @@ def load_geojson(filepath: Union[str, Path]) -> gpd.GeoDataFrame:
     gpd.GeoDataFrame
         Loaded GeoDataFrame
     """
-    return gpd.read_file(filepath)
+    return gpd.read_file(filepath, engine='pyogrio')
+
+
+def freshest_copy(filepath: Union[str, Path]) -> Optional[Path]:
+    """
+    Pick between a GeoJSON export and its GeoParquet copy (same name, .parquet).
+    
+    The GeoParquet copy is faster to read, but not every writer of the
+    GeoJSON also refreshes it, so it is only used when it is at least as
+    new as the GeoJSON (or the GeoJSON is missing).
+    
+    Parameters
+    ----------
+    filepath : str or Path
+        Path of the GeoJSON export
+    
+    Returns
+    -------
+    Path or None
+        The file to read, or None if neither exists
+    """
+    filepath = Path(filepath)
+    parquet_path = filepath.with_suffix('.parquet')
+    
+    if parquet_path.exists() and (
+        not filepath.exists() or parquet_path.stat().st_mtime >= filepath.stat().st_mtime
+    ):
+        return parquet_path
+    return filepath if filepath.exists() else None
+
+
+def load_buildings(filepath: Union[str, Path]) -> gpd.GeoDataFrame:
+    """
+    Load a buildings file, GeoParquet or any format read_file supports.
+    
+    Parameters
+    ----------
+    filepath : str or Path
+        Input file path (e.g. from `freshest_copy`)
+    
+    Returns
+    -------
+    gpd.GeoDataFrame
+        Loaded GeoDataFrame
+    """
+    filepath = Path(filepath)
+    if filepath.suffix == '.parquet':
+        return gpd.read_parquet(filepath)
+    return load_geojson(filepath)
 
 
 def load_config(config_path: Union[str, Path]) -> Dict[str, Any]:
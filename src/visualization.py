@@ -8,23 +8,18 @@ This module provides functions for creating visualizations including:
 """
 
 import os
+import importlib.util
 from pathlib import Path
 from typing import Optional, List, Tuple, Dict, Any
 import numpy as np
 import pandas as pd
 import geopandas as gpd
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-from matplotlib.colors import LinearSegmentedColormap, Normalize
-import seaborn as sns
 from shapely.geometry import box
 
 # Optional imports for interactive maps
-try:
-    import folium
-    FOLIUM_AVAILABLE = True
-except ImportError:
-    FOLIUM_AVAILABLE = False
+# (folium is only imported inside the map functions that need it)
+FOLIUM_AVAILABLE = importlib.util.find_spec("folium") is not None
+if not FOLIUM_AVAILABLE:
     print("Warning: folium not installed. Interactive maps will not be available.")
 
 
@@ -42,11 +37,67 @@ FIGURES_DIR.mkdir(parents=True, exist_ok=True)
 MAPS_DIR.mkdir(parents=True, exist_ok=True)
 REPORTS_DIR.mkdir(parents=True, exist_ok=True)
 
-# Visualization styling
-sns.set_style("whitegrid")
-plt.rcParams['figure.dpi'] = 300
-plt.rcParams['savefig.dpi'] = 300
-plt.rcParams['font.size'] = 10
+# Visualization styling is applied on first use (see _get_pyplot) so that
+# importing this module does not pull in matplotlib/seaborn.
+_STYLE_APPLIED = False
+
+
+def _get_pyplot():
+    """Import pyplot lazily and apply the module's default styling once."""
+    global _STYLE_APPLIED
+    import matplotlib.pyplot as plt
+
+    if not _STYLE_APPLIED:
+        import seaborn as sns
+        sns.set_style("whitegrid")
+        plt.rcParams['figure.dpi'] = 300
+        plt.rcParams['savefig.dpi'] = 300
+        plt.rcParams['font.size'] = 10
+        _STYLE_APPLIED = True
+
+    return plt
+
+
+# Encoder settings for saved figures. PNG encoding dominates save time for
+# large high-DPI figures, and a low zlib level is much faster for a modest
+# size increase. WebP output is far smaller still.
+PNG_COMPRESS_LEVEL = 1
+WEBP_QUALITY = 85
+
+
+def _save_figure(plt, output_path, fmt: Optional[str] = None, **savefig_kwargs) -> Path:
+    """
+    Save the current figure with fast Pillow encoder settings.
+    
+    Parameters
+    ----------
+    plt : module
+        matplotlib.pyplot (as returned by _get_pyplot)
+    output_path : str or Path
+        Path to save the figure
+    fmt : str, optional
+        Output format override ('png' or 'webp'); replaces the path suffix
+    **savefig_kwargs
+        Extra keyword arguments for plt.savefig
+    
+    Returns
+    -------
+    Path
+        Path the figure was written to
+    """
+    output_path = Path(output_path)
+    if fmt is not None:
+        output_path = output_path.with_suffix(f".{fmt.lower()}")
+    
+    pil_kwargs = {
+        '.png': {'compress_level': PNG_COMPRESS_LEVEL},
+        '.webp': {'quality': WEBP_QUALITY},
+    }.get(output_path.suffix.lower())
+    if pil_kwargs is not None:
+        savefig_kwargs['pil_kwargs'] = pil_kwargs
+    
+    plt.savefig(output_path, **savefig_kwargs)
+    return output_path
 
 
 # ============================================================================
@@ -60,7 +111,8 @@ def plot_solar_potential_choropleth(
     title: str = 'Building-level Solar Potential',
     cmap: str = 'autumn',
     figsize: Tuple[int, int] = (12, 10),
-    dark_theme: bool = True
+    dark_theme: bool = True,
+    fmt: Optional[str] = None
 ) -> None:
     """
     Create a choropleth map showing solar potential with enhanced styling.
@@ -81,7 +133,12 @@ def plot_solar_potential_choropleth(
         Figure size (width, height)
     dark_theme : bool
         Use dark background theme
+    fmt : str, optional
+        Image format override ('png' or 'webp')
     """
+    from matplotlib.colors import Normalize
+    plt = _get_pyplot()
+
     if output_path is None:
         output_path = str(MAPS_DIR / "solar_potential_choropleth.png")
     
@@ -136,7 +193,7 @@ def plot_solar_potential_choropleth(
         cbar.yaxis.label.set_fontweight('bold')
     
     plt.tight_layout()
-    plt.savefig(output_path, bbox_inches='tight', facecolor=bg_color)
+    output_path = _save_figure(plt, output_path, fmt, bbox_inches='tight', facecolor=bg_color)
     plt.close()
     
     print(f"Solar potential choropleth saved to: {output_path}")
@@ -180,6 +237,8 @@ def create_interactive_folium_map(
         print("Error: folium not installed. Install with: pip install folium")
         return None
     
+    import folium
+    
     if output_path is None:
         output_path = str(MAPS_DIR / "interactive_map.html")
     
@@ -265,7 +324,8 @@ def plot_pairwise_analysis(
     buildings_gdf: gpd.GeoDataFrame,
     column: str = 'solar_potential_kwh',
     output_path: Optional[str] = None,
-    hue_column: Optional[str] = None
+    hue_column: Optional[str] = None,
+    fmt: Optional[str] = None
 ) -> None:
     """
     Create pairwise analysis plots using seaborn.
@@ -280,7 +340,12 @@ def plot_pairwise_analysis(
         Path to save figure
     hue_column : str, optional
         Column to use for color coding categories
+    fmt : str, optional
+        Image format override ('png' or 'webp')
     """
+    import seaborn as sns
+    plt = _get_pyplot()
+
     if output_path is None:
         output_path = str(FIGURES_DIR / "pairwise_analysis.png")
     
@@ -329,7 +394,7 @@ def plot_pairwise_analysis(
     g.fig.suptitle('Pairwise Analysis of Building Characteristics', y=1.02, fontsize=16, fontweight='bold')
     
     plt.tight_layout()
-    plt.savefig(output_path, bbox_inches='tight', dpi=300)
+    output_path = _save_figure(plt, output_path, fmt, bbox_inches='tight', dpi=300)
     plt.close()
     
     print(f"Pairwise analysis saved to: {output_path}")
@@ -371,6 +436,8 @@ def create_top_buildings_map(
         print("Error: folium not installed")
         return None
     
+    import folium
+    
     if output_path is None:
         output_path = str(MAPS_DIR / f"top_{top_n}_buildings.html")
     
@@ -439,7 +506,8 @@ def plot_suitability_map(
     title: str = "Solar Panel Suitability Map",
     figsize: Tuple[int, int] = (15, 12),
     cmap: str = 'RdYlGn',
-    show_legend: bool = True
+    show_legend: bool = True,
+    fmt: Optional[str] = None
 ) -> None:
     """
     Create a choropleth map showing building suitability scores.
@@ -460,7 +528,11 @@ def plot_suitability_map(
         Matplotlib colormap name
     show_legend : bool
         Whether to show the legend
+    fmt : str, optional
+        Image format override ('png' or 'webp')
     """
+    plt = _get_pyplot()
+
     if output_path is None:
         output_path = MAPS_DIR / "suitability_map.png"
     
@@ -483,7 +555,7 @@ def plot_suitability_map(
     ax.grid(True, alpha=0.3)
     
     plt.tight_layout()
-    plt.savefig(output_path, bbox_inches='tight')
+    output_path = _save_figure(plt, output_path, fmt, bbox_inches='tight')
     plt.close()
     
     print(f"Suitability map saved to: {output_path}")
@@ -494,7 +566,8 @@ def plot_solar_irradiance_map(
     irradiance_column: str = 'solar_irradiance',
     output_path: Optional[str] = None,
     title: str = "Solar Irradiance Distribution",
-    figsize: Tuple[int, int] = (15, 12)
+    figsize: Tuple[int, int] = (15, 12),
+    fmt: Optional[str] = None
 ) -> None:
     """
     Create a map showing solar irradiance distribution.
@@ -511,7 +584,11 @@ def plot_solar_irradiance_map(
         Map title
     figsize : tuple
         Figure size
+    fmt : str, optional
+        Image format override ('png' or 'webp')
     """
+    plt = _get_pyplot()
+
     if output_path is None:
         output_path = MAPS_DIR / "solar_irradiance_map.png"
     
@@ -533,7 +610,7 @@ def plot_solar_irradiance_map(
     ax.grid(True, alpha=0.3)
     
     plt.tight_layout()
-    plt.savefig(output_path, bbox_inches='tight')
+    output_path = _save_figure(plt, output_path, fmt, bbox_inches='tight')
     plt.close()
     
     print(f"Solar irradiance map saved to: {output_path}")
@@ -545,7 +622,8 @@ def plot_categorical_map(
     output_path: Optional[str] = None,
     title: Optional[str] = None,
     figsize: Tuple[int, int] = (15, 12),
-    color_map: Optional[Dict[str, str]] = None
+    color_map: Optional[Dict[str, str]] = None,
+    fmt: Optional[str] = None
 ) -> None:
     """
     Create a categorical map (e.g., suitability classes, roof types).
@@ -564,7 +642,11 @@ def plot_categorical_map(
         Figure size
     color_map : dict, optional
         Mapping of categories to colors
+    fmt : str, optional
+        Image format override ('png' or 'webp')
     """
+    plt = _get_pyplot()
+
     if output_path is None:
         output_path = MAPS_DIR / f"{category_column}_map.png"
     
@@ -594,7 +676,7 @@ def plot_categorical_map(
     ax.grid(True, alpha=0.3)
     
     plt.tight_layout()
-    plt.savefig(output_path, bbox_inches='tight')
+    output_path = _save_figure(plt, output_path, fmt, bbox_inches='tight')
     plt.close()
     
     print(f"Categorical map saved to: {output_path}")
@@ -608,7 +690,8 @@ def plot_suitability_distribution(
     buildings_gdf: gpd.GeoDataFrame,
     suitability_column: str = 'suitability_score',
     output_path: Optional[str] = None,
-    bins: int = 50
+    bins: int = 50,
+    fmt: Optional[str] = None
 ) -> None:
     """
     Create histogram of suitability scores.
@@ -623,7 +706,11 @@ def plot_suitability_distribution(
         Path to save the figure
     bins : int
         Number of histogram bins
+    fmt : str, optional
+        Image format override ('png' or 'webp')
     """
+    plt = _get_pyplot()
+
     if output_path is None:
         output_path = FIGURES_DIR / "suitability_distribution.png"
     
@@ -644,7 +731,7 @@ def plot_suitability_distribution(
     ax.grid(True, alpha=0.3)
     
     plt.tight_layout()
-    plt.savefig(output_path, bbox_inches='tight')
+    output_path = _save_figure(plt, output_path, fmt, bbox_inches='tight')
     plt.close()
     
     print(f"Distribution plot saved to: {output_path}")
@@ -654,7 +741,8 @@ def plot_top_buildings(
     buildings_gdf: gpd.GeoDataFrame,
     suitability_column: str = 'suitability_score',
     top_n: int = 20,
-    output_path: Optional[str] = None
+    output_path: Optional[str] = None,
+    fmt: Optional[str] = None
 ) -> None:
     """
     Create bar chart of top N most suitable buildings.
@@ -669,7 +757,11 @@ def plot_top_buildings(
         Number of top buildings to show
     output_path : str, optional
         Path to save the figure
+    fmt : str, optional
+        Image format override ('png' or 'webp')
     """
+    plt = _get_pyplot()
+
     if output_path is None:
         output_path = FIGURES_DIR / f"top_{top_n}_buildings.png"
     
@@ -703,7 +795,7 @@ def plot_top_buildings(
                 f'{width:.2f}', ha='left', va='center', fontsize=8)
     
     plt.tight_layout()
-    plt.savefig(output_path, bbox_inches='tight')
+    output_path = _save_figure(plt, output_path, fmt, bbox_inches='tight')
     plt.close()
     
     print(f"Top buildings chart saved to: {output_path}")
@@ -714,7 +806,8 @@ def plot_scatter_analysis(
     x_column: str,
     y_column: str,
     output_path: Optional[str] = None,
-    title: Optional[str] = None
+    title: Optional[str] = None,
+    fmt: Optional[str] = None
 ) -> None:
     """
     Create scatter plot for analyzing relationships between variables.
@@ -731,7 +824,11 @@ def plot_scatter_analysis(
         Path to save the figure
     title : str, optional
         Plot title
+    fmt : str, optional
+        Image format override ('png' or 'webp')
     """
+    plt = _get_pyplot()
+
     if output_path is None:
         output_path = FIGURES_DIR / f"{x_column}_vs_{y_column}.png"
     
@@ -756,7 +853,7 @@ def plot_scatter_analysis(
             facecolor='wheat', alpha=0.5))
     
     plt.tight_layout()
-    plt.savefig(output_path, bbox_inches='tight')
+    output_path = _save_figure(plt, output_path, fmt, bbox_inches='tight')
     plt.close()
     
     print(f"Scatter plot saved to: {output_path}")
@@ -895,7 +992,7 @@ if __name__ == "__main__":
         python src/visualization.py
     
     Generates two sets of visualizations:
-    1. Test dataset (ranked_test_buildings.json) - default names
+    1. Test dataset (ranked_test_buildings.json, or its .parquet copy if newer) - default names
     2. Full Amsterdam dataset (ranked_buildings.json) - names with '_amsterdam' suffix
     
     Outputs:
@@ -905,6 +1002,19 @@ if __name__ == "__main__":
             - suitability_map_amsterdam.png, solar_potential_choropleth_amsterdam.png, etc.
     """
     import sys
+    import matplotlib
+    
+    try:
+        from src.utils import freshest_copy, load_buildings
+    except ModuleNotFoundError:
+        from utils import freshest_copy, load_buildings
+    
+    # Headless rendering: select Agg before pyplot is first imported so no
+    # GUI backend is probed, and speed up rasterizing large polygon collections
+    matplotlib.use('Agg', force=True)
+    matplotlib.rcParams['path.simplify'] = True
+    matplotlib.rcParams['path.simplify_threshold'] = 1.0
+    matplotlib.rcParams['agg.path.chunksize'] = 10000
     
     print("=" * 70)
     print("SOLAR PANEL SUITABILITY MAPPING - VISUALIZATION SUITE")
@@ -936,15 +1046,19 @@ if __name__ == "__main__":
         print(f"PROCESSING: {dataset_name.upper()}")
         print("=" * 70)
         
-        if not data_path.exists():
+        # GeoParquet copy if it is at least as new as the GeoJSON export
+        # (the notebooks only rewrite the GeoJSON)
+        resolved_path = freshest_copy(data_path)
+        if resolved_path is None:
             print(f"\n⚠️  Skipping {dataset_name}: File not found")
             print(f"   Expected: {data_path}")
             continue
+        data_path = resolved_path
         
         try:
             # Load ranked buildings
             print(f"\n📂 Loading data from: {data_path}")
-            buildings = gpd.read_file(data_path)
+            buildings = load_buildings(data_path)
             
             print(f"✓ Loaded {len(buildings)} buildings")
             print(f"✓ CRS: {buildings.crs}")
@@ -952,17 +1066,21 @@ if __name__ == "__main__":
             
             # Normalize column names to handle different naming conventions
             # Create mapping from alternate names to standard names
-            if 'solar_energy_kwh_year' in buildings.columns and 'energy_potential' not in buildings.columns:
-                buildings = buildings.rename(columns={'solar_energy_kwh_year': 'energy_potential'})
-                print("   ✓ Normalized: solar_energy_kwh_year → energy_potential")
-            
-            if 'roof_area_m2' in buildings.columns and 'roof_area' not in buildings.columns:
-                buildings = buildings.rename(columns={'roof_area_m2': 'roof_area'})
-                print("   ✓ Normalized: roof_area_m2 → roof_area")
+            column_aliases = [
+                ('solar_energy_kwh_year', 'energy_potential'),
+                ('roof_area_m2', 'roof_area'),
+                ('roof_orientation_deg', 'orientation'),
+            ]
+            rename_map = {
+                src: dst for src, dst in column_aliases
+                if src in buildings.columns and dst not in buildings.columns
+            }
             
-            if 'roof_orientation_deg' in buildings.columns and 'orientation' not in buildings.columns:
-                buildings = buildings.rename(columns={'roof_orientation_deg': 'orientation'})
-                print("   ✓ Normalized: roof_orientation_deg → orientation")
+            # Single in-place rename instead of one full copy per alias
+            if rename_map:
+                buildings.rename(columns=rename_map, inplace=True)
+                for src, dst in rename_map.items():
+                    print(f"   ✓ Normalized: {src} → {dst}")
             
             # Check for required columns
             required_cols = ['suitability_score']
@@ -1089,10 +1207,10 @@ if __name__ == "__main__":
             # Filter report_cols to only include columns that exist
             report_cols = [col for col in report_cols if col in buildings.columns]
             
-            # Save to CSV (drop geometry for CSV)
+            # Save to CSV (build plain columns directly, geometry is never copied)
             csv_path = REPORTS_DIR / f"top_{top_n}_priority_buildings{suffix}.csv"
-            top_buildings_data = top_buildings[report_cols].copy()
-            top_buildings_data.to_csv(csv_path, index=False)
+            records = {col: top_buildings[col].to_numpy() for col in report_cols}
+            pd.DataFrame(records, copy=False).to_csv(csv_path, index=False)
             print(f"   ✓ Saved: {csv_path}")
             
             # 10. Generate JSON summary report
@@ -6,12 +6,11 @@ import pytest
 from src.api import app
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client():
-    """Create test client for Flask app."""
+    """Create a single test client for the Flask app, shared by all API tests."""
     app.config['TESTING'] = True
-    with app.test_client() as client:
-        yield client
+    return app.test_client()
 
 
 def test_home_endpoint(client):
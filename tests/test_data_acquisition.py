@@ -14,15 +14,24 @@ from src.data_acquisition import (
 
 
 # ============================================================
-# Tests for fetch_pdok_buildings
+# Fixtures
 # ============================================================
 
-def test_fetch_pdok_buildings_with_bbox():
-    """Test fetching buildings with a small bounding box."""
+@pytest.fixture(scope="session")
+def small_amsterdam_buildings():
+    """Fetch a small Amsterdam area from PDOK once and share it across tests."""
     # Small area in Amsterdam (should return quickly)
     bbox = (4.88, 52.36, 4.89, 52.37)
-    
-    buildings = fetch_pdok_buildings(bbox, output_path=None, page_size=10)
+    return fetch_pdok_buildings(bbox, output_path=None, page_size=10)
+
+
+# ============================================================
+# Tests for fetch_pdok_buildings
+# ============================================================
+
+def test_fetch_pdok_buildings_with_bbox(small_amsterdam_buildings):
+    """Test fetching buildings with a small bounding box."""
+    buildings = small_amsterdam_buildings
     
     # Assertions
     assert isinstance(buildings, gpd.GeoDataFrame)
@@ -244,12 +253,17 @@ def test_fetch_real_pvgis_data():
 # Parametrized Tests
 # ============================================================
 
+def test_fetch_pdok_buildings_returns_correct_crs(small_amsterdam_buildings):
+    """Test that buildings are always returned in EPSG:28992."""
+    assert small_amsterdam_buildings.crs.to_string() == "EPSG:28992"
+
+
+@pytest.mark.slow
 @pytest.mark.parametrize("bbox,expected_crs", [
-    ((4.88, 52.36, 4.89, 52.37), "EPSG:28992"),
     ((4.90, 52.35, 4.91, 52.36), "EPSG:28992"),
 ])
-def test_fetch_pdok_buildings_returns_correct_crs(bbox, expected_crs):
-    """Test that buildings are always returned in EPSG:28992."""
+def test_fetch_pdok_buildings_returns_correct_crs_other_area(bbox, expected_crs):
+    """Test the CRS invariant for a second area (extra network call, slow)."""
     buildings = fetch_pdok_buildings(bbox, output_path=None, page_size=10)
     assert buildings.crs.to_string() == expected_crs
 
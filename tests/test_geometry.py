@@ -11,6 +11,7 @@ import geopandas as gpd
 from src.geometry import (
     calculate_roof_area,
     calculate_roof_orientation,
+    calculate_roof_orientation_batch,
     calculate_roof_slope,
     get_roof_vertices,
     load_solar_data,
@@ -109,6 +110,24 @@ def test_calculate_roof_orientation_multipolygon():
     assert 0 <= orientation <= 360
 
 
+def test_calculate_roof_orientation_batch_matches_scalar():
+    """Test that the vectorized orientation matches the per-building version."""
+    geometries = [
+        Polygon([(0, 0), (5, 0), (5, 20), (0, 20)]),
+        Polygon([(0, 0), (20, 0), (20, 5), (0, 5)]),
+        Polygon([(0, 0), (10, 3), (7, 12), (-2, 8)]),
+        MultiPolygon([
+            Polygon([(0, 0), (5, 0), (5, 5), (0, 5)]),
+            Polygon([(10, 10), (30, 10), (30, 15), (10, 15)])
+        ])
+    ]
+    
+    batch = calculate_roof_orientation_batch(gpd.GeoSeries(geometries))
+    expected = [calculate_roof_orientation(geom) for geom in geometries]
+    
+    assert batch == pytest.approx(expected)
+
+
 # =============================================================================
 # Roof Slope Tests
 # =============================================================================
@@ -6,6 +6,7 @@ import pytest
 import pandas as pd
 import geopandas as gpd
 import numpy as np
+import shapely
 from shapely.geometry import Point, Polygon
 from src.ranking import (
     calculate_suitability_score,
@@ -108,6 +109,23 @@ def test_calculate_suitability_score_boundary():
     assert score >= 60  # From area (20%), energy (40%), and orientation (20%)
 
 
+def test_calculate_suitability_score_vectorized():
+    """Test that array inputs give the same scores as scalar calls."""
+    roof_area = np.array([500, 20, 150, 0])
+    energy_potential = np.array([50000, 1000, 15000, 0])
+    shading_factor = np.array([0.0, 0.8, 0.2, 0])
+    orientation = np.array([180, 0, 135, 0])
+    
+    scores = calculate_suitability_score(roof_area, energy_potential, shading_factor, orientation)
+    expected = [
+        calculate_suitability_score(a, e, s, o)
+        for a, e, s, o in zip(roof_area, energy_potential, shading_factor, orientation)
+    ]
+    
+    assert isinstance(scores, np.ndarray)
+    assert scores == pytest.approx(expected)
+
+
 # =============================================================================
 # Classification Tests
 # =============================================================================
@@ -150,6 +168,16 @@ def test_classify_building_suitability_boundaries():
     assert classify_building_suitability(59.9) == "Moderate"
 
 
+def test_classify_building_suitability_vectorized():
+    """Test classifying an array of scores matches scalar classification."""
+    scores = np.array([0, 19.9, 20, 39.9, 40, 59.9, 60, 79.9, 80, 100])
+    
+    categories = classify_building_suitability(scores)
+    
+    assert list(categories) == [classify_building_suitability(s) for s in scores]
+    assert classify_building_suitability(np.nan) == "Unsuitable"
+
+
 # =============================================================================
 # Ranking Tests
 # =============================================================================
@@ -160,7 +188,7 @@ def test_rank_buildings():
     data = {
         'building_id': [1, 2, 3, 4, 5],
         'suitability_score': [85, 45, 92, 30, 67],
-        'geometry': [Point(0, 0), Point(1, 1), Point(2, 2), Point(3, 3), Point(4, 4)]
+        'geometry': shapely.points(np.arange(5), np.arange(5))
     }
     gdf = gpd.GeoDataFrame(data, crs="EPSG:4326")
     
@@ -182,7 +210,7 @@ def test_rank_buildings_with_ties():
     data = {
         'building_id': [1, 2, 3, 4],
         'suitability_score': [80, 80, 90, 70],
-        'geometry': [Point(i, i) for i in range(4)]
+        'geometry': shapely.points(np.arange(4), np.arange(4))
     }
     gdf = gpd.GeoDataFrame(data, crs="EPSG:4326")
     
@@ -192,6 +220,23 @@ def test_rank_buildings_with_ties():
     assert ranked.iloc[0]['building_id'] == 3
     # Bottom should be building 4
     assert ranked.iloc[3]['building_id'] == 4
+    # Tied buildings keep their input order
+    assert list(ranked['building_id']) == [3, 1, 2, 4]
+
+
+def test_rank_buildings_float32_scores():
+    """Test ranking scores stored as float32, with a missing score last."""
+    data = {
+        'building_id': [1, 2, 3, 4],
+        'suitability_score': np.array([55.5, np.nan, 91.25, 70.0], dtype=np.float32),
+        'geometry': shapely.points(np.arange(4), np.arange(4))
+    }
+    gdf = gpd.GeoDataFrame(data, crs="EPSG:4326")
+    
+    ranked = rank_buildings(gdf)
+    
+    assert list(ranked['building_id']) == [3, 4, 1, 2]
+    assert ranked['suitability_score'].dtype == np.float32
 
 
 def test_rank_buildings_empty():
@@ -227,7 +272,7 @@ def test_get_priority_list():
     data = {
         'building_id': range(1, 21),
         'suitability_score': np.random.randint(40, 95, 20),
-        'geometry': [Point(i, i) for i in range(20)]
+        'geometry': shapely.points(np.arange(20), np.arange(20))
     }
     gdf = gpd.GeoDataFrame(data, crs="EPSG:4326")
     
@@ -236,7 +281,7 @@ def test_get_priority_list():
     assert len(top_10) == 10
     # Check that scores are descending
     scores = top_10['suitability_score'].values
-    assert all(scores[i] >= scores[i+1] for i in range(len(scores)-1))
+    assert np.all(np.diff(scores) <= 0)
 
 
 def test_get_priority_list_more_than_available():
@@ -244,7 +289,7 @@ def test_get_priority_list_more_than_available():
     data = {
         'building_id': [1, 2, 3],
         'suitability_score': [80, 70, 60],
-        'geometry': [Point(i, i) for i in range(3)]
+        'geometry': shapely.points(np.arange(3), np.arange(3))
     }
     gdf = gpd.GeoDataFrame(data, crs="EPSG:4326")
     
@@ -259,7 +304,7 @@ def test_get_priority_list_ranking_preserved():
     data = {
         'building_id': range(1, 101),
         'suitability_score': range(100, 0, -1),  # Decreasing scores
-        'geometry': [Point(i, i) for i in range(100)]
+        'geometry': shapely.points(np.arange(100), np.arange(100))
     }
     gdf = gpd.GeoDataFrame(data, crs="EPSG:4326")
     
@@ -269,3 +314,34 @@ def test_get_priority_list_ranking_preserved():
     expected_scores = list(range(100, 80, -1))
     actual_scores = top_20['suitability_score'].values
     assert list(actual_scores) == expected_scores
+
+
+def test_get_priority_list_from_ranked_buildings():
+    """Test priority list on already-ranked buildings re-ranks the subset."""
+    data = {
+        'building_id': range(1, 11),
+        'suitability_score': [50, 90, 10, 70, 30, 80, 20, 60, 40, 100],
+        'geometry': shapely.points(np.arange(10), np.arange(10))
+    }
+    ranked = rank_buildings(gpd.GeoDataFrame(data, crs="EPSG:4326"))
+    
+    top_3 = get_priority_list(ranked, top_n=3)
+    
+    assert list(top_3['building_id']) == [10, 2, 6]
+    assert list(top_3['rank']) == [1, 2, 3]
+    assert list(top_3.columns).count('rank') == 1
+    # Input frame is left untouched
+    assert list(ranked['rank']) == list(range(1, 11))
+
+
+def test_rank_buildings_near_equal_float64_scores():
+    """Test scores closer than float32 resolution still rank by their stored value."""
+    buildings = gpd.GeoDataFrame({
+        'id': [1, 2, 3],
+        'suitability_score': [50.0000001, 50.0000002, 50.0000003]
+    }, geometry=shapely.points([0, 1, 2], [0, 0, 0]))
+    
+    ranked = rank_buildings(buildings)
+    
+    assert ranked['id'].tolist() == [3, 2, 1]
+    assert get_priority_list(buildings, top_n=1)['id'].tolist() == [3]
@@ -5,11 +5,15 @@ Unit tests for shading analysis.
 import pytest
 import numpy as np
 import geopandas as gpd
+import shapely
 from shapely.geometry import Polygon, Point
 from src.shading import (
     calculate_shadow_length,
     calculate_shading_factor,
-    find_nearby_buildings
+    calculate_shading_factors_batch,
+    calculate_shading_factors_parallel,
+    find_nearby_buildings,
+    sun_tangent
 )
 
 
@@ -62,6 +66,12 @@ def test_calculate_shadow_length_90_degrees():
     assert shadow_length == 0.0
 
 
+def test_calculate_shadow_length_matches_sun_tangent():
+    """Test shadow length uses the same tangent as the shading factor path."""
+    for sun_elevation in [30.04, 0.04, 45.0, 89.96]:
+        assert calculate_shadow_length(10, sun_elevation) == pytest.approx(10 / sun_tangent(sun_elevation))
+
+
 def test_calculate_shadow_length_various_heights():
     """Test shadow length with various building heights."""
     sun_elevation = 45
@@ -208,6 +218,60 @@ def test_calculate_shading_factor_sun_angles():
     assert shading_30 >= 0 and shading_60 >= 0
 
 
+def test_calculate_shading_factor_precomputed_tan_sun():
+    """Test that a precomputed sun tangent gives the same shading."""
+    target_geom = Polygon([(0, 0), (10, 0), (10, 10), (0, 10)])
+    nearby_buildings = gpd.GeoDataFrame({
+        'geometry': [Polygon([(15, 0), (25, 0), (25, 10), (15, 10)])],
+        'building_height': [30]
+    })
+    
+    for sun_elevation in [0, 30, 45, 60, 90]:
+        expected = calculate_shading_factor(target_geom, 10, nearby_buildings, sun_elevation)
+        shading = calculate_shading_factor(
+            target_geom, 10, nearby_buildings,
+            tan_sun=sun_tangent(sun_elevation)
+        )
+        assert shading == pytest.approx(expected)
+
+
+def test_calculate_shading_factors_batch_matches_per_building():
+    """Test batch shading against per-building shading of radius neighbours."""
+    rng = np.random.default_rng(42)
+    corners = rng.uniform(0, 300, size=(60, 2))
+    buildings = gpd.GeoDataFrame({
+        'geometry': shapely.box(corners[:, 0], corners[:, 1], corners[:, 0] + 12, corners[:, 1] + 12),
+        'building_height': rng.uniform(3, 40, size=60)
+    }, crs="EPSG:28992")
+    
+    shading = calculate_shading_factors_batch(buildings, search_radius=100.0, sun_elevation=30)
+    
+    expected = []
+    for geom, height in zip(buildings.geometry, buildings['building_height']):
+        centroid = geom.centroid
+        nearby = buildings[buildings.geometry.centroid.distance(centroid) <= 100.0]
+        expected.append(calculate_shading_factor(geom, height, nearby, sun_elevation=30))
+    
+    assert shading == pytest.approx(expected)
+    assert calculate_shading_factors_batch(buildings.iloc[0:0]).shape == (0,)
+
+
+def test_calculate_shading_factors_parallel_matches_batch():
+    """Test threaded shading driver against the single-pass batch."""
+    rng = np.random.default_rng(7)
+    corners = rng.uniform(0, 400, size=(101, 2))
+    buildings = gpd.GeoDataFrame({
+        'geometry': shapely.box(corners[:, 0], corners[:, 1], corners[:, 0] + 15, corners[:, 1] + 10),
+        'building_height': rng.uniform(3, 50, size=101)
+    }, crs="EPSG:28992")
+    
+    expected = calculate_shading_factors_batch(buildings, sun_elevation=35)
+    
+    for n_jobs in [1, 4, -1]:
+        shading = calculate_shading_factors_parallel(buildings, sun_elevation=35, n_jobs=n_jobs)
+        assert shading == pytest.approx(expected)
+
+
 # =============================================================================
 # Nearby Building Search Tests
 # =============================================================================
@@ -263,7 +327,7 @@ def test_find_nearby_buildings_sorted_by_distance():
     # Check if sorted by distance
     if len(nearby) > 1:
         distances = nearby['distance'].values
-        assert all(distances[i] <= distances[i+1] for i in range(len(distances)-1))
+        assert np.all(np.diff(distances) >= 0)
 
 
 def test_find_nearby_buildings_excludes_self():
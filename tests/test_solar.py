@@ -2,12 +2,16 @@
 Unit tests for solar energy calculations.
 """
 
+import math
 import pytest
 import numpy as np
 from src.solar import (
     calculate_solar_potential,
+    calculate_solar_potential_batch,
     calculate_roi,
-    calculate_payback_period
+    calculate_roi_batch,
+    calculate_payback_period,
+    calculate_payback_batch
 )
 
 
@@ -93,7 +97,7 @@ def test_calculate_solar_potential_various_efficiencies():
     for eff in efficiencies:
         energy = calculate_solar_potential(area, irradiance, eff, shading)
         expected = area * irradiance * eff
-        assert energy == pytest.approx(expected, rel=1e-2)
+        assert math.isclose(energy, expected, rel_tol=1e-2)
 
 
 def test_calculate_solar_potential_realistic_amsterdam():
@@ -109,6 +113,24 @@ def test_calculate_solar_potential_realistic_amsterdam():
     assert energy == pytest.approx(24123.75, rel=1e-2)
 
 
+def test_calculate_solar_potential_batch():
+    """Test batch solar potential matches the scalar calculation."""
+    area = np.array([100, 150, 0, 200])
+    irradiance = np.array([1000, 1050, 1000, 1000])
+    shading = np.array([0.0, 0.15, 0.5, 0.3])
+    
+    energy = calculate_solar_potential_batch(area, irradiance, 0.18, shading)
+    expected = [calculate_solar_potential(a, i, 0.18, s) for a, i, s in zip(area, irradiance, shading)]
+    
+    assert energy == pytest.approx(expected, rel=1e-2)
+
+
+def test_calculate_solar_potential_batch_invalid_shading():
+    """Test that batch calculation rejects invalid shading factors."""
+    with pytest.raises(ValueError):
+        calculate_solar_potential_batch([100, 100], [1000, 1000], 0.18, [0.2, 1.5])
+
+
 # =============================================================================
 # ROI Tests
 # =============================================================================
@@ -164,6 +186,17 @@ def test_calculate_roi_different_prices():
         assert isinstance(roi, float)
 
 
+def test_calculate_roi_batch():
+    """Test batch ROI matches the scalar ROI, including zero area."""
+    energy = [18000, 40000, 0, 5000]
+    area = [100, 100, 100, 0]
+    
+    roi = calculate_roi_batch(energy, 0.25, 200, area)
+    
+    expected = [calculate_roi(e, 0.25, 200, a) for e, a in zip(energy, area)]
+    assert roi == pytest.approx(expected)
+
+
 # =============================================================================
 # Payback Period Tests
 # =============================================================================
@@ -251,6 +284,17 @@ def test_calculate_payback_period_realistic():
     assert 3 <= payback <= 10
 
 
+def test_calculate_payback_batch():
+    """Test batch payback matches the scalar payback, including no revenue."""
+    energy = [18000, 40000, 0, 5000]
+    area = [100, 100, 100, 0]
+    
+    payback = calculate_payback_batch(energy, 0.25, 200, area)
+    
+    expected = [calculate_payback_period(e, 0.25, 200, a) for e, a in zip(energy, area)]
+    assert payback == pytest.approx(expected)
+
+
 # =============================================================================
 # Edge Cases and Integration Tests
 # =============================================================================
@@ -288,4 +332,4 @@ def test_solar_potential_proportionality():
     energy_100 = calculate_solar_potential(100, irradiance, efficiency, shading)
     energy_200 = calculate_solar_potential(200, irradiance, efficiency, shading)
     
-    assert energy_200 == pytest.approx(2 * energy_100, rel=1e-2)
+    assert math.isclose(energy_200, 2 * energy_100, rel_tol=1e-2)
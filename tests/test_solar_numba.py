@@ -0,0 +1,36 @@
+"""
+Unit tests for the array kernels in solar_numba.
+"""
+
+import pytest
+import numpy as np
+from src.solar import calculate_solar_potential, calculate_roi, calculate_payback_period
+from src.solar_numba import (
+    solar_potential_kernel,
+    roi_kernel,
+    payback_kernel
+)
+
+
+def test_solar_potential_kernel_matches_scalar():
+    """Test solar potential kernel against the scalar formula."""
+    area = np.array([100.0, 0.0, -10.0, 250.0])
+    irradiance = np.array([1000.0, 1000.0, 1000.0, 0.0])
+    shading = np.array([0.3, 0.0, 0.0, 0.1])
+    
+    energy = solar_potential_kernel(area, irradiance, 0.18, shading)
+    expected = [calculate_solar_potential(a, i, 0.18, s) for a, i, s in zip(area, irradiance, shading)]
+    
+    assert energy == pytest.approx(expected)
+
+
+def test_roi_and_payback_kernels_match_scalar():
+    """Test ROI and payback kernels against the scalar functions."""
+    energy = np.array([18000.0, 0.0, 10000.0, 5000.0])
+    area = np.array([100.0, 100.0, 0.0, 50.0])
+    
+    roi = roi_kernel(energy, 0.25, 200.0, area)
+    payback = payback_kernel(energy, 0.25, 200.0, area)
+    
+    assert roi == pytest.approx([calculate_roi(e, 0.25, 200, a) for e, a in zip(energy, area)])
+    assert payback == pytest.approx([calculate_payback_period(e, 0.25, 200, a) for e, a in zip(energy, area)])
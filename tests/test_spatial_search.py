@@ -37,9 +37,56 @@ def test_spatial_index_creation(sample_buildings_gdf):
     spatial_index = SpatialIndex(sample_buildings_gdf)
     
     assert spatial_index.kdtree is not None
-    assert len(spatial_index.coordinates) == 5
-    assert spatial_index.buildings_gdf['x'].notna().all()
-    assert spatial_index.buildings_gdf['y'].notna().all()
+    assert spatial_index.coords.shape == (5, 2)
+    assert spatial_index.coords.flags['C_CONTIGUOUS']
+    assert 'x' not in spatial_index.buildings_gdf.columns
+
+
+def test_spatial_index_kdtree_disk_cache(sample_buildings_gdf, tmp_path):
+    """Test the KD-tree is pickled once and reused for the same buildings."""
+    first = SpatialIndex(sample_buildings_gdf, cache_dir=tmp_path)
+    assert first.kdtree is not None
+    cache_files = list(tmp_path.glob("kdtree_*.pkl"))
+    assert len(cache_files) == 1
+    
+    second = SpatialIndex(sample_buildings_gdf, cache_dir=tmp_path)
+    assert list(tmp_path.glob("kdtree_*.pkl")) == cache_files
+    
+    query = [0.0, 0.0]
+    assert second.kdtree.query(query, k=3)[1].tolist() == first.kdtree.query(query, k=3)[1].tolist()
+
+
+def test_spatial_index_kdtree_disk_cache_failures(sample_buildings_gdf, tmp_path):
+    """Test a broken cache entry or an unwritable cache dir only skips the cache."""
+    SpatialIndex(sample_buildings_gdf, cache_dir=tmp_path).kdtree
+    (cache_file,) = tmp_path.glob("kdtree_*.pkl")
+    cache_file.write_bytes(b"not a pickle")
+    assert SpatialIndex(sample_buildings_gdf, cache_dir=tmp_path).kdtree.n == 5
+    
+    # A file where the cache directory should be makes every write fail
+    blocked = tmp_path / "blocked"
+    blocked.write_text("")
+    assert SpatialIndex(sample_buildings_gdf, cache_dir=blocked).kdtree.n == 5
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([cache_file.name, "blocked"])
+
+
+def test_spatial_index_lazy_trees(sample_buildings_gdf):
+    """Test trees are built on first query and rebuilt after a reset."""
+    spatial_index = SpatialIndex(sample_buildings_gdf)
+    assert 'kdtree' not in vars(spatial_index)
+    assert 'strtree' not in vars(spatial_index)
+    
+    spatial_index.find_nearest_neighbors(Point(0, 0), k=1)
+    assert 'kdtree' in vars(spatial_index)
+    
+    # Move building A far away; the reset picks up the new geometry
+    spatial_index.buildings_gdf.loc[0, 'geometry'] = Polygon([(900, 900), (910, 900), (910, 910), (900, 910)])
+    spatial_index._reset_index()
+    assert 'kdtree' not in vars(spatial_index)
+    
+    nearest = spatial_index.find_nearest_neighbors(Point(905, 905), k=1)
+    assert nearest.iloc[0]['building_id'] == 'A'
+    assert spatial_index.find_within_radius(Point(905, 905), 1)['building_id'].tolist() == ['A']
 
 
 def test_find_nearest_neighbors(sample_buildings_gdf):
@@ -56,8 +103,22 @@ def test_find_nearest_neighbors(sample_buildings_gdf):
     assert nearest.iloc[0]['distance'] < 1
 
 
+def test_find_nearest_neighbors_batch(sample_buildings_gdf):
+    """Test batched nearest neighbor search against single-point queries."""
+    spatial_index = SpatialIndex(sample_buildings_gdf)
+    query_points = [Point(0, 0), Point(100, 0), Point(500, 500)]
+    
+    distances, indices = spatial_index.find_nearest_neighbors_batch(query_points, k=2)
+    
+    assert indices.shape == (3, 2)
+    for point, dist, idx in zip(query_points, distances, indices):
+        nearest = spatial_index.find_nearest_neighbors(point, k=2)
+        assert np.allclose(nearest['distance'], dist)
+        assert nearest.index.tolist() == sample_buildings_gdf.index[idx].tolist()
+
+
 def test_find_within_radius(sample_buildings_gdf):
-    """Test KD-tree range search."""
+    """Test STRtree range search."""
     spatial_index = SpatialIndex(sample_buildings_gdf)
     query_point = Point(0, 0)
     radius = 60  # Should find buildings within 60 units
@@ -70,6 +131,39 @@ def test_find_within_radius(sample_buildings_gdf):
     assert nearby['distance'].is_monotonic_increasing
 
 
+def test_find_within_radius_uses_footprints():
+    """Test range search measures distance to the footprint, not the centroid."""
+    buildings = gpd.GeoDataFrame(
+        {'building_id': ['near', 'far']},
+        geometry=[Polygon([(50, -5), (150, -5), (150, 5), (50, 5)]),
+                  Polygon([(200, 0), (210, 0), (210, 10), (200, 10)])],
+    )
+    spatial_index = SpatialIndex(buildings)
+    
+    # Centroid of 'near' is 100 m away, but its edge is only 50 m away
+    nearby = spatial_index.find_within_radius(Point(0, 0), radius=60)
+    
+    assert nearby['building_id'].tolist() == ['near']
+    assert nearby['distance'].iloc[0] == pytest.approx(50)
+    
+    neighbors = spatial_index.find_within_radius_batch([Point(0, 0)], radius=60)
+    assert [list(idx) for idx in neighbors] == [[0]]
+
+
+def test_find_within_radius_batch(sample_buildings_gdf):
+    """Test batched range search against single-point queries."""
+    spatial_index = SpatialIndex(sample_buildings_gdf)
+    query_points = [Point(0, 0), Point(100, 0), Point(500, 500)]
+    
+    neighbors = spatial_index.find_within_radius_batch(query_points, radius=60)
+    
+    assert len(neighbors) == 3
+    for point, idx in zip(query_points, neighbors):
+        expected = spatial_index.find_within_radius(point, 60).index
+        assert list(idx) == sorted(sample_buildings_gdf.index.get_indexer(expected))
+    assert len(neighbors[2]) == 0
+
+
 def test_binary_search_building_by_score(sample_buildings_gdf):
     """Test binary search for building by score."""
     # Sort by score for binary search
@@ -117,6 +211,21 @@ def test_quicksort_buildings_ascending(sample_buildings_gdf):
     assert actual_order == expected_order
 
 
+def test_quicksort_buildings_stable_both_directions():
+    """Test ties keep input order and missing scores go last, both ways."""
+    buildings = gpd.GeoDataFrame(
+        {'suitability_score': [50.0, 80.0, np.nan, 50.0, 80.0]},
+        geometry=[Point(i, 0) for i in range(5)]
+    )
+    
+    assert quicksort_buildings(buildings).index.tolist() == [1, 4, 0, 3, 2]
+    assert quicksort_buildings(buildings, ascending=True).index.tolist() == [0, 3, 1, 4, 2]
+    
+    # Cached order is refreshed when scores change in place
+    buildings.loc[3, 'suitability_score'] = 90.0
+    assert quicksort_buildings(buildings).index.tolist() == [3, 1, 4, 0, 2]
+
+
 def test_linear_search_building_by_id(sample_buildings_gdf):
     """Test linear search for building by ID."""
     result = linear_search_building_by_id(sample_buildings_gdf, 'C')
@@ -132,6 +241,18 @@ def test_linear_search_not_found(sample_buildings_gdf):
     assert result is None
 
 
+def test_linear_search_repeated_lookups(sample_buildings_gdf):
+    """Test repeated ID lookups reuse the index and see in-place ID edits."""
+    assert linear_search_building_by_id(sample_buildings_gdf, 'E').iloc[0]['suitability_score'] == 85
+    
+    sample_buildings_gdf.loc[4, 'building_id'] = 'F'
+    assert linear_search_building_by_id(sample_buildings_gdf, 'F').iloc[0]['suitability_score'] == 85
+    
+    spatial_index = SpatialIndex(sample_buildings_gdf)
+    assert spatial_index.find_by_id('B').iloc[0]['suitability_score'] == 92
+    assert spatial_index.find_by_id('Z') is None
+
+
 def test_find_top_k_buildings(sample_buildings_gdf):
     """Test finding top k buildings."""
     top_3 = find_top_k_buildings(sample_buildings_gdf, k=3)
@@ -148,3 +269,15 @@ def test_find_top_k_more_than_available(sample_buildings_gdf):
     
     # Should return all 5 buildings
     assert len(top_10) == 5
+
+
+def test_find_top_k_ties_keep_input_order():
+    """Test top k returns scores descending, ties in input order."""
+    gdf = gpd.GeoDataFrame({
+        'building_id': ['A', 'B', 'C', 'D', 'E', 'F'],
+        'suitability_score': [70, 90, 70, 50, 70, 90]
+    }, geometry=[Point(i, i) for i in range(6)], crs="EPSG:28992")
+    
+    top_4 = find_top_k_buildings(gdf, k=4)
+    
+    assert list(top_4['building_id']) == ['B', 'F', 'A', 'C']
@@ -2,108 +2,61 @@
 Generates buildings_3d_debug_run.json with basic stats.
 """
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import numpy as np
 import geopandas as gpd
-from shapely.geometry import shape
-import math
-
-p = Path('buildings.geojson')
-if not p.exists():
-    print('ERROR: buildings.geojson not found in workspace root')
-    raise SystemExit(1)
-
-b = gpd.read_file(p)
-print('Loaded buildings:', len(b))
-
-# find height
-candidates = ['b3_h_max','height','hoogte','building:height','roofHeight','z','maxh','hoogte_m','aantal_verdiepingen','floors']
-height_col = next((c for c in candidates if c in b.columns), None)
-print('Detected height column:', height_col)
-if height_col is None:
-    if 'aantal_verdiepingen' in b.columns:
-        b['height'] = b['aantal_verdiepingen'].astype(float) * 3.0
-        height_col = 'height'
-    else:
-        b['height'] = 8.0
-        height_col = 'height'
-
-# transform to 4326 if needed
-if b.crs is not None and b.crs.to_epsg() != 4326:
-    b = b.to_crs('EPSG:4326')
-else:
-    if b.crs is None:
-        b = b.set_crs(epsg=4326, allow_override=True)
-
-# Convert datetime-like columns to strings to avoid JSON serialization errors
-import pandas as pd
-for col in b.columns:
-    if pd.api.types.is_datetime64_any_dtype(b[col]):
-        b[col] = b[col].astype(str).replace('NaT', None)
-    elif b[col].dtype == object:
-        # object dtype may contain Timestamp instances
-        if b[col].apply(lambda x: isinstance(x, pd.Timestamp) if x is not None else False).any():
-            b[col] = b[col].astype(str).replace('NaT', None)
-
-# basic validation
-geojson = json.loads(b.to_json())
-features = geojson.get('features', [])
-valid = 0
-dropped = 0
-counts = {'Point':0,'LineString':0,'Polygon':0,'MultiPolygon':0,'Other':0}
-for feat in features:
-    try:
-        s = shape(feat.get('geometry'))
-        t = s.geom_type
-        if t in counts:
-            counts[t] += 1
-        else:
-            counts['Other'] += 1
-        if s.is_empty:
-            dropped += 1
-            continue
-        valid += 1
-    except Exception:
-        dropped += 1
-
-print(f'total: {len(features)}, valid: {valid}, dropped: {dropped}')
-print('geometry counts:', counts)
-
-# serialize sample to check size
-sample_geojson = {'type':'FeatureCollection','features':features[:200]}
-size = len(json.dumps(sample_geojson).encode('utf-8'))
-print('Sample (200) serialized size (bytes):', size)
-
-# write debug file
-Path('buildings_3d_debug_run.json').write_text(json.dumps({'total':len(features),'valid':valid,'dropped':dropped,'counts':counts,'sample_size_bytes':size}, indent=2))
-print('Wrote buildings_3d_debug_run.json')
-
-# --- Generate sample HTML (same logic as notebook) ---
-SAMPLE_LIMIT = 200
-sample_features = features[:SAMPLE_LIMIT]
-sample_geojson = {'type': 'FeatureCollection', 'features': sample_features}
-js_geojson = json.dumps(sample_geojson)
-size_bytes = len(js_geojson.encode('utf-8'))
-
-# Compute center from sample centroids
-from shapely.geometry import shape
-centroids = []
-for feat in sample_features:
-    try:
-        s = shape(feat.get('geometry'))
-        c = s.centroid
-        if math.isfinite(c.x) and math.isfinite(c.y):
-            centroids.append((c.x, c.y))
-    except Exception:
-        continue
-if centroids:
-    center_lon = sum(x for x, y in centroids) / len(centroids)
-    center_lat = sum(y for x, y in centroids) / len(centroids)
-else:
-    bbox = b.total_bounds
-    center_lon = float((bbox[0] + bbox[2]) / 2)
-    center_lat = float((bbox[1] + bbox[3]) / 2)
-
-html = f"""
+import shapely
+
+# Optional bulk OGR reader (falls back to geopandas.read_file)
+try:
+    import pyogrio
+    PYOGRIO_AVAILABLE = True
+except ImportError:
+    PYOGRIO_AVAILABLE = False
+
+# Optional fast JSON encoder (falls back to the standard library)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps_bytes(obj, indent=False):
+    """Serialize obj to UTF-8 JSON bytes, with orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode('utf-8')
+
+
+# Geometries per validation thread; smaller inputs are checked on one thread
+VALIDATION_CHUNK_SIZE = 50_000
+
+
+def validate_chunk(geoms):
+    """
+    Tally one chunk of geometries (shapely releases the GIL, so chunks can run on threads).
+    
+    Returns counts of Point, LineString, Polygon, MultiPolygon, other types,
+    missing and empty geometries, in that order.
+    """
+    type_ids = shapely.get_type_id(geoms)  # GEOS type id, -1 for missing geometry
+    missing = type_ids < 0
+    empty = shapely.is_empty(geoms) & ~missing
+    type_counts = np.bincount(type_ids[~missing], minlength=8)
+    named = type_counts[[0, 1, 3, 6]]
+    return np.array([*named, type_counts.sum() - named.sum(), missing.sum(), empty.sum()])
+
+
+# Height color ramp for the extrusions (height in m -> RGB)
+COLOR_STOPS = np.array([0, 10, 30, 60])
+COLOR_RGB = np.array([[0xf2, 0xf0, 0xf7], [0xcb, 0xc9, 0xe2], [0x9e, 0x9a, 0xc8], [0x6a, 0x51, 0xa3]])
+HEX_BYTE = np.array([f'{i:02x}' for i in range(256)])
+
+# Sample map page, rendered with str.format_map (literal braces are doubled)
+_HTML_TEMPLATE = """
 <!DOCTYPE html>
 <html>
 <head>
@@ -119,7 +72,7 @@ html = f"""
   </style>
 </head>
 <body>
-<div id=\"info\">Features: {len(sample_features)} (sample) — center: {0},{0}<br>Serialized sample size: {size_bytes} bytes</div>
+<div id=\"info\">Features: {n_features} (sample) — center: {center_lon:.5f},{center_lat:.5f}<br>Serialized sample size: {size_bytes} bytes</div>
 <div id=\"map\"></div>
 <script>
 function webglSupport() {{
@@ -145,7 +98,7 @@ function webglSupport() {{
     const map = new maplibregl.Map({{
       container: 'map',
       style: 'https://demotiles.maplibre.org/style.json',
-      center: [0,0],
+      center: [{center_lon},{center_lat}],
       zoom: 15,
       pitch: 60,
       bearing: -17.6,
@@ -159,7 +112,7 @@ function webglSupport() {{
         type: 'fill-extrusion',
         source: 'buildings',
         paint: {{
-          'fill-extrusion-color': ['interpolate', ['linear'], ['get', '{height_col}'], 0, '#f2f0f7', 10, '#cbc9e2', 30, '#9e9ac8', 60, '#6a51a3'],
+          'fill-extrusion-color': ['get', 'color'],
           'fill-extrusion-height': ['get', '{height_col}'],
           'fill-extrusion-base': 0,
           'fill-extrusion-opacity': 0.9
@@ -183,6 +136,110 @@ function webglSupport() {{
 </body>
 </html>
 """
+
+p = Path('buildings.geojson')
+if not p.exists():
+    print('ERROR: buildings.geojson not found in workspace root')
+    raise SystemExit(1)
+
+# find height
+candidates = ['b3_h_max','height','hoogte','building:height','roofHeight','z','maxh','hoogte_m','aantal_verdiepingen','floors']
+
+# read only geometry and the height candidates (names not in the file are skipped)
+if PYOGRIO_AVAILABLE:
+    b = pyogrio.read_dataframe(p, columns=candidates)
+else:
+    b = gpd.read_file(p)
+print('Loaded buildings:', len(b))
+
+height_col = next((c for c in candidates if c in b.columns), None)
+print('Detected height column:', height_col)
+if height_col is None:
+    if 'aantal_verdiepingen' in b.columns:
+        b['height'] = b['aantal_verdiepingen'].astype(float) * 3.0
+        height_col = 'height'
+    else:
+        b['height'] = 8.0
+        height_col = 'height'
+
+# transform to 4326 if needed
+if b.crs is not None and b.crs.to_epsg() != 4326:
+    b = b.to_crs('EPSG:4326')
+else:
+    if b.crs is None:
+        b = b.set_crs(epsg=4326, allow_override=True)
+
+# Convert datetime-like columns to strings to avoid JSON serialization errors
+import pandas as pd
+for col in b.columns:
+    if pd.api.types.is_datetime64_any_dtype(b[col]):
+        b[col] = b[col].astype(str).replace('NaT', None)
+    elif b[col].dtype == object:
+        # object dtype may contain Timestamp instances; infer_dtype scans in C
+        kind = pd.api.types.infer_dtype(b[col], skipna=True)
+        if kind in ('datetime', 'datetime64'):
+            b[col] = b[col].astype(str).replace('NaT', None)
+        elif kind.startswith('mixed'):
+            values = b[col].to_numpy()
+            if np.fromiter((isinstance(x, pd.Timestamp) for x in values), dtype=bool, count=len(values)).any():
+                b[col] = b[col].astype(str).replace('NaT', None)
+
+# basic validation, vectorized over the geometry array (no GeoJSON round-trip);
+# large inputs are split into chunks checked on several threads
+geoms = np.asarray(b.geometry.values)
+total = len(b)
+n_chunks = min(os.cpu_count() or 1, max(1, total // VALIDATION_CHUNK_SIZE))
+with ThreadPoolExecutor(max_workers=n_chunks) as executor:
+    tallies = np.sum(list(executor.map(validate_chunk, np.array_split(geoms, n_chunks))), axis=0)
+n_point, n_line, n_polygon, n_multipolygon, n_other, n_missing, n_empty = tallies.tolist()
+valid = total - n_missing - n_empty
+dropped = n_missing + n_empty
+counts = {'Point': n_point, 'LineString': n_line, 'Polygon': n_polygon,
+          'MultiPolygon': n_multipolygon, 'Other': n_other}
+
+print(f'total: {total}, valid: {valid}, dropped: {dropped}')
+print('geometry counts:', counts)
+
+# --- Generate sample HTML (same logic as notebook) ---
+SAMPLE_LIMIT = 200
+
+# Extrusion color per building, computed once here instead of by a MapLibre
+# 'interpolate' expression on every frame: linear in RGB between the stops,
+# clamped at both ends; missing heights get the color of height 0
+sample = b.iloc[:SAMPLE_LIMIT]
+heights = np.nan_to_num(pd.to_numeric(sample[height_col], errors='coerce').to_numpy(dtype=float), nan=0.0)
+rgb = np.rint([np.interp(heights, COLOR_STOPS, COLOR_RGB[:, k]) for k in range(3)]).astype(int)
+colors = np.char.add(np.char.add(np.char.add('#', HEX_BYTE[rgb[0]]), HEX_BYTE[rgb[1]]), HEX_BYTE[rgb[2]])
+sample = sample.assign(color=colors)
+
+# only the sample is converted to GeoJSON features (as a dict, no JSON round-trip)
+sample_features = sample.to_geo_dict().get('features', [])
+sample_geojson = {'type': 'FeatureCollection', 'features': sample_features}
+
+# serialize sample once: its size goes to the debug file, the text into the HTML
+sample_bytes = dumps_bytes(sample_geojson)
+size = size_bytes = len(sample_bytes)
+js_geojson = sample_bytes.decode('utf-8')
+print(f'Sample ({SAMPLE_LIMIT}) serialized size (bytes):', size)
+
+# write debug file
+Path('buildings_3d_debug_run.json').write_bytes(dumps_bytes({'total':total,'valid':valid,'dropped':dropped,'counts':counts,'sample_size_bytes':size}, indent=True))
+print('Wrote buildings_3d_debug_run.json')
+
+# Compute center from sample centroids (missing/empty geometries have no coordinates)
+centroids = shapely.get_coordinates(shapely.centroid(b.geometry.values[:SAMPLE_LIMIT]))
+centroids = centroids[np.isfinite(centroids).all(axis=1)]
+if len(centroids):
+    center_lon, center_lat = centroids.mean(axis=0).tolist()
+else:
+    bbox = b.total_bounds
+    center_lon = float((bbox[0] + bbox[2]) / 2)
+    center_lat = float((bbox[1] + bbox[3]) / 2)
+
+html = _HTML_TEMPLATE.format_map({
+    'n_features': len(sample_features), 'size_bytes': size_bytes, 'js_geojson': js_geojson,
+    'height_col': height_col, 'center_lon': center_lon, 'center_lat': center_lat,
+})
 out = Path('buildings_3d_sample.html')
 out.write_text(html, encoding='utf-8')
 print('Saved sample HTML to', out.resolve())